@@ -19,7 +19,10 @@ def create_texture_atlas(asset_path):
         for filename in sorted(os.listdir(folder_path)):
             if filename.endswith(".png"):
                 img_path = os.path.join(folder_path, filename)
-                image = pygame.image.load(img_path).convert_alpha()
+                image = pygame.image.load(img_path)
+                # Converting needs a display; headless runs keep the loaded format
+                if pygame.display.get_surface() is not None:
+                    image = image.convert_alpha()
                 img_width, img_height = image.get_size()
                 
                 # Wrap to new row if necessary
@@ -46,3 +49,16 @@ def create_texture_atlas(asset_path):
         atlas_surface.blit(image, pos)
     
     return atlas_surface, textures
+
+def scale_texture_atlas(atlas_surface, textures, factor):
+    """
+    Scale an atlas and the texture rects in it.
+
+    :return: (scaled atlas surface, scaled texture rects)
+    """
+    scaled_surface = pygame.transform.scale(atlas_surface, (atlas_surface.get_width() * factor, atlas_surface.get_height() * factor))
+    scaled_textures = {
+        category: {name: (x * factor, y * factor, w * factor, h * factor) for name, (x, y, w, h) in items.items()}
+        for category, items in textures.items()
+    }
+    return scaled_surface, scaled_textures
@@ -0,0 +1,145 @@
+"""
+Run many headless simulations in parallel and report how they went, for balancing the config.
+
+    python src/batch.py plan.json --workers 4 --report report.csv
+
+The plan lists the runs. Every run is simulated once per seed, with its config overrides
+applied on top of config.json. The seed replaces SEED, so every seed mines its own world:
+
+    {
+        "seconds": 300,
+        "seeds": [1, 2, 3],
+        "runs": [
+            {"name": "default"},
+            {"name": "more tnt", "config": {"TNT_SPAWN_INTERVAL_SECONDS_MAX": 10}, "seconds": 600}
+        ]
+    }
+"""
+import argparse
+import contextlib
+import csv
+import json
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+ORES = ("coal", "iron_ingot", "copper_ingot", "gold_ingot", "redstone", "lapis_lazuli", "diamond", "emerald")
+
+def expand_plan(plan):
+    """
+    Turn a plan into one entry per simulation.
+
+    :return: List of dicts with name, seed, seconds and config overrides.
+    """
+    simulations = []
+    for run in plan["runs"]:
+        for seed in run.get("seeds", plan.get("seeds", [0])):
+            simulations.append({
+                "name": run.get("name", "run"),
+                "seed": seed,
+                "seconds": run.get("seconds", plan.get("seconds", 60)),
+                "config": run.get("config", {}),
+            })
+    return simulations
+
+def simulate(simulation):
+    """Run one headless game (in a worker process) and return its results."""
+    from config import config
+    config.update(simulation["config"])
+    config["CHAT_CONTROL"] = False  # Never talk to YouTube from a simulation
+    random.seed(simulation["seed"])
+
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        import chunk
+        chunk.SEED = simulation["seed"]  # Chunks are generated from SEED, not from `random`
+        import main  # Imported after the overrides, main reads the config when it is loaded
+        result = main.game(headless=True, max_seconds=simulation["seconds"], resume=False)
+
+    return {
+        "name": simulation["name"],
+        "seed": simulation["seed"],
+        "seconds": result["seconds"],
+        "frames": result["frames"],
+        "depth": -result["depth"],  # Blocks below the surface (the game's Y goes negative)
+        **{ore: result["amounts"].get(ore, 0) for ore in ORES},
+        "frame_p50": round(result["frame_ms"][0], 3),
+        "frame_p95": round(result["frame_ms"][1], 3),
+        "frame_p99": round(result["frame_ms"][2], 3),
+        "peak_bodies": result["peak_bodies"],
+        "wall_seconds": round(time.perf_counter() - start, 1),
+    }
+
+def run_batch(simulations, workers=None):
+    """
+    Run the simulations on a process pool, each in a fresh process (the world lives in module state).
+
+    :return: Results in the order of `simulations`.
+    """
+    results = [None] * len(simulations)
+    with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=1) as pool:
+        futures = {pool.submit(simulate, simulation): i for i, simulation in enumerate(simulations)}
+        for future in as_completed(futures):
+            i = futures[future]
+            results[i] = future.result()
+            print(f"[{sum(r is not None for r in results)}/{len(results)}] {results[i]['name']} "
+                  f"seed {results[i]['seed']}: depth {results[i]['depth']} in {results[i]['wall_seconds']:.1f}s")
+    return results
+
+def summarize(results):
+    """
+    Combine the results of all seeds of each run.
+
+    :return: Dict of run name to its averages (depth_min and depth_max are the shallowest and deepest run, peak bodies is the maximum over the seeds).
+    """
+    runs = {}
+    for result in results:
+        runs.setdefault(result["name"], []).append(result)
+
+    summary = {}
+    for name, run_results in runs.items():
+        depths = [r["depth"] for r in run_results]
+        summary[name] = {
+            "simulations": len(run_results),
+            "depth": statistics.mean(depths),
+            "depth_min": min(depths),
+            "depth_max": max(depths),
+            **{ore: statistics.mean(r[ore] for r in run_results) for ore in ORES},
+            "frame_p50": statistics.mean(r["frame_p50"] for r in run_results),
+            "frame_p95": statistics.mean(r["frame_p95"] for r in run_results),
+            "frame_p99": statistics.mean(r["frame_p99"] for r in run_results),
+            "peak_bodies": max(r["peak_bodies"] for r in run_results),
+        }
+    return summary
+
+def print_summary(summary):
+    print(f"{'run':<20}{'sims':>5}{'depth':>9}{'min':>7}{'max':>7}{'ores':>8}{'p50 ms':>8}{'p95 ms':>8}{'p99 ms':>8}{'bodies':>8}")
+    for name, run in summary.items():
+        ores = sum(run[ore] for ore in ORES)
+        print(f"{name:<20}{run['simulations']:>5}{run['depth']:>9.1f}{run['depth_min']:>7}{run['depth_max']:>7}"
+              f"{ores:>8.1f}{run['frame_p50']:>8.2f}{run['frame_p95']:>8.2f}{run['frame_p99']:>8.2f}{run['peak_bodies']:>8}")
+
+def write_report(results, path):
+    """Write one CSV row per simulation."""
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(results[0]))
+        writer.writeheader()
+        writer.writerows(results)
+    print(f"Results of {len(results)} simulations written to {path}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run headless Falling Pickaxe simulations in parallel")
+    parser.add_argument("plan", help="JSON file with the runs, see the top of this file")
+    parser.add_argument("--workers", type=int, default=None, help="Simulations running at the same time (default: one per CPU)")
+    parser.add_argument("--report", metavar="CSV", default=None, help="Write the results of every simulation to this file")
+    args = parser.parse_args()
+
+    with open(args.plan, "r") as plan_file:
+        simulations = expand_plan(json.load(plan_file))
+
+    results = run_batch(simulations, args.workers)
+    print_summary(summarize(results))
+    if args.report is not None:
+        write_report(results, args.report)
@@ -1,160 +1,230 @@
-import pygame
-import pymunk
-from constants import BLOCK_SIZE
-import random 
-
-class Block:
-    _destroy_stage_cache = {}
-
-    def __init__(self, space, x, y, name, texture_atlas, atlas_items):
-        if name == "bedrock":
-            self.max_hp = 1000000000
-            self.hp = 1000000000
-        elif name == "stone":
-            self.max_hp = 10
-            self.hp = 10
-        elif name == "andesite":
-            self.hp = 10
-            self.max_hp = 10
-        elif name == "diorite":
-            self.hp = 10
-            self.max_hp = 10
-        elif name == "granite":
-            self.hp = 10
-            self.max_hp = 10
-        elif name == "coal_ore":
-            self.hp = 15
-            self.max_hp = 15
-        elif name == "iron_ore":
-            self.hp = 15
-            self.max_hp = 15
-        elif name == "copper_ore":
-            self.hp = 15
-            self.max_hp = 15
-        elif name == "gold_ore":
-            self.hp = 20
-            self.max_hp = 20
-        elif name == "diamond_ore":
-            self.hp = 20
-            self.max_hp = 20
-        elif name == "emerald_ore":
-            self.hp = 20
-            self.max_hp = 20
-        elif name == "obsidian":
-            self.hp = 100
-            self.max_hp = 100
-        elif name == "redstone_ore":
-            self.hp = 15
-            self.max_hp = 15
-        elif name == "lapis_ore":
-            self.hp = 15
-            self.max_hp = 15
-        elif name == "mossy_cobblestone":
-            self.hp = 12
-            self.max_hp = 12
-        elif name == "cobblestone":
-            self.hp = 22
-            self.max_hp = 22
+import gametime
+import heapq
+import itertools
+import random
+from collections import deque
+
+# Block type ids as stored in the chunk arrays. Id 0 is air (no block).
+BLOCK_NAMES = [
+    None,
+    "bedrock",
+    "stone",
+    "andesite",
+    "diorite",
+    "granite",
+    "coal_ore",
+    "iron_ore",
+    "copper_ore",
+    "gold_ore",
+    "diamond_ore",
+    "emerald_ore",
+    "obsidian",
+    "redstone_ore",
+    "lapis_ore",
+    "mossy_cobblestone",
+    "cobblestone",
+    "grass_block",
+    "dirt",
+]
+AIR = 0
+BLOCK_IDS = {name: block_id for block_id, name in enumerate(BLOCK_NAMES) if name is not None}
+
+block_hp = {
+    "bedrock": 1000000000,
+    "stone": 10,
+    "andesite": 10,
+    "diorite": 10,
+    "granite": 10,
+    "coal_ore": 15,
+    "iron_ore": 15,
+    "copper_ore": 15,
+    "gold_ore": 20,
+    "diamond_ore": 20,
+    "emerald_ore": 20,
+    "obsidian": 100,
+    "redstone_ore": 15,
+    "lapis_ore": 15,
+    "mossy_cobblestone": 12,
+    "cobblestone": 22,
+}
+
+# Max HP indexed by block type id (blocks without an entry have 1 HP)
+BLOCK_MAX_HP = [block_hp.get(name, 1) if name is not None else 0 for name in BLOCK_NAMES]
+
+_texture_cache = {}
+_destroy_stage_cache = {}
+
+def block_textures(texture_atlas, atlas_items):
+    """Block textures indexed by block type id (None for air)."""
+    # Keyed by the atlas itself: it is rebuilt when the window is resized, and only the current one is kept
+    if texture_atlas not in _texture_cache:
+        _texture_cache.clear()
+        _texture_cache[texture_atlas] = [
+            texture_atlas.subsurface(atlas_items["block"][name]) if name is not None else None
+            for name in BLOCK_NAMES
+        ]
+    return _texture_cache[texture_atlas]
+
+def destroy_stage_textures(texture_atlas, atlas_items):
+    """The 10 destroy stage overlays, from barely scratched to almost broken."""
+    if texture_atlas not in _destroy_stage_cache:
+        _destroy_stage_cache.clear()
+        _destroy_stage_cache[texture_atlas] = [
+            texture_atlas.subsurface(atlas_items["destroy_stage"][f"destroy_stage_{i}"])
+            for i in range(10)
+        ]
+    return _destroy_stage_cache[texture_atlas]
+
+def damage_stage(hp, max_hp):
+    """Destroy stage (0-9) for a damaged block, or None if it is at full HP."""
+    if hp >= max_hp:
+        return None
+    return min(int((1 - (hp / max_hp)) * 9), 9)  # Scale hp to 0-9 range
+
+def add_drops(name, hud):
+    """Credit the items dropped by a destroyed block to the HUD."""
+    if name == "coal_ore":
+        hud.amounts["coal"] += 1  # Add to HUD amounts
+    elif name == "iron_ore":
+        hud.amounts["iron_ingot"] += 1  # Add to HUD amounts
+    elif name == "copper_ore":
+        hud.amounts["copper_ingot"] += 1  # Add to HUD amounts
+    elif name == "gold_ore":
+        hud.amounts["gold_ingot"] += 1  # Add to HUD amounts
+    elif name == "diamond_ore":
+        hud.amounts["diamond"] += 1  # Add to HUD amounts
+    elif name == "emerald_ore":
+        hud.amounts["emerald"] += 1  # Add to HUD amounts
+    elif name == "redstone_ore":
+        hud.amounts["redstone"] += random.randint(4, 5)  # Add to HUD amounts
+    elif name == "lapis_ore":
+        hud.amounts["lapis_lazuli"] += random.randint(4, 8)  # Add to HUD amounts
+
+# Damaged blocks waiting for their next heal or their destruction, ordered by due time
+_heal_queue = []
+_heal_order = itertools.count()  # Tie breaker for blocks due at the same time
+
+def _schedule(block, due_time):
+    # Only the latest entry of a block counts, older ones are skipped when popped
+    block.next_heal_time = due_time
+    block.heal_entry = next(_heal_order)
+    heapq.heappush(_heal_queue, (due_time, block.heal_entry, block))
+
+# Blocks whose HP reached 0, waiting to be removed after the current physics step
+_destroyed_queue = deque()
+
+def destroy_blocks(space, hud):
+    """
+    Remove the blocks broken since the last call.
+
+    Called once after every physics step: cells are removed from their chunks in bulk
+    and drops are credited to the HUD (the hit that broke a block already played its sound).
+
+    :return: Number of destroyed blocks
+    """
+    broken = {}  # Chunk -> cell indices
+    while _destroyed_queue:
+        block = _destroyed_queue.popleft()
+        # Skip blocks that healed or whose chunk was unloaded in the meantime
+        if block.hp > 0 or block.chunk.blocks.get(block.index) is not block:
+            continue
+        broken.setdefault(block.chunk, []).append(block.index)
+
+    destroyed = 0
+    for chunk, indices in broken.items():
+        names = [BLOCK_NAMES[chunk.types[index]] for index in indices]
+        chunk.remove_cells(indices, space)  # Remove from physics world
+        for name in names:
+            add_drops(name, hud)
+        destroyed += len(indices)
+    return destroyed
+
+def update_blocks(current_time=None):
+    """
+    Heal the damaged blocks that are due.
+
+    Only blocks that have been hit are tracked, so the work per frame depends on the
+    number of damaged blocks, not on the number of blocks on screen.
+    """
+    if current_time is None:
+        current_time = gametime.get_ticks()
+
+    while _heal_queue and _heal_queue[0][0] <= current_time:
+        _, entry, block = heapq.heappop(_heal_queue)
+
+        # Skip entries replaced by a later hit, and blocks that are gone (destroyed, healed or unloaded)
+        if block.heal_entry != entry or block.chunk.blocks.get(block.index) is not block:
+            continue
+
+        # Broken blocks are waiting in the destroyed queue
+        if block.hp <= 0:
+            continue
+
+        # Heal 20% of the max HP every 5 seconds (but not exceeding max_hp)
+        block.hp = min(block.hp + block.max_hp * 0.2, block.max_hp)
+        if block.hp < block.max_hp:
+            _schedule(block, current_time + block.heal_interval)
         else:
-            self.hp = 1
-            self.max_hp = 1
-
-        self.texture_atlas = texture_atlas
-        self.atlas_items = atlas_items
-
-        rect = atlas_items["block"][name]  
-        self.texture = texture_atlas.subsurface(rect)
-
-        width, height = self.texture.get_size()
+            block.chunk.release_block(block.index)  # Fully healed blocks don't need to be tracked anymore
 
-        # Create a static physics body (doesn't move)
-        self.body = pymunk.Body(body_type=pymunk.Body.STATIC)
-        self.body.position = (x + BLOCK_SIZE//2, y + BLOCK_SIZE//2)
-
-        # Create a hitbox
-        self.shape = pymunk.Poly.create_box(self.body, (width, height))
-        self.shape.elasticity = 1  # No bounce
-        self.shape.collision_type = 2 # Identifier for collisions
-        self.shape.friction = 1
-        self.shape.block_ref = self  # Reference to the block object
+class Block:
+    """
+    Healing and destruction state of a single damaged cell.
 
-        self.destroyed = False
+    Block objects are only created for cells that have been hit. The block type
+    and HP live in the arrays of the owning chunk.
+    """
 
-        self.name = name
+    def __init__(self, chunk, index):
+        self.chunk = chunk
+        self.index = index
 
-        self.last_heal_time = None  # Track time of last healing (None initially)
         self.heal_interval = 5000  # Heal every 5 seconds (5000 ms)
-        self.first_hit_time = None  # Track the time when the block was first hit
-
-        cache_key = id(texture_atlas)
-        if cache_key not in Block._destroy_stage_cache:
-            Block._destroy_stage_cache[cache_key] = [
-                texture_atlas.subsurface(atlas_items["destroy_stage"][f"destroy_stage_{i}"])
-                for i in range(10)
-            ]
-        self.destroy_textures = Block._destroy_stage_cache[cache_key]
-
-        space.add(self.body, self.shape)
-
-    def update(self, space, hud, current_time=None):
-        """Update block state"""
-        if current_time is None:
-            current_time = pygame.time.get_ticks()
-
-        # Check if the block was hit for the first time
-        if self.first_hit_time is None and self.hp < self.max_hp:
-            self.first_hit_time = current_time
-            self.last_heal_time = self.first_hit_time
-
-        # Check if the block has been hit before and start healing 5 seconds after it was first hit
-        if self.first_hit_time is not None:
-            # Start healing 5 seconds after the block was first hit
-            if current_time - self.first_hit_time >= 5000:
-                # Heal 20% of the max HP every 5 seconds (but not exceeding max_hp)
-                if current_time - self.last_heal_time >= self.heal_interval:
-                    healing_amount = self.max_hp * 0.2
-                    self.hp = min(self.hp + healing_amount, self.max_hp)
-
-                    # Reset the healing timer after each heal
-                    self.last_heal_time = current_time
-        
-        if self.hp <= 0 and not self.destroyed:
-            self.destroyed = True
-            space.remove(self.body, self.shape)  # Remove from physics world
-
-            if self.name == "coal_ore":
-                hud.amounts["coal"] += 1  # Add to HUD amounts
-            elif self.name == "iron_ore":
-                hud.amounts["iron_ingot"] += 1  # Add to HUD amounts
-            elif self.name == "copper_ore":
-                hud.amounts["copper_ingot"] += 1  # Add to HUD amounts
-            elif self.name == "gold_ore":
-                hud.amounts["gold_ingot"] += 1  # Add to HUD amounts
-            elif self.name == "diamond_ore":
-                hud.amounts["diamond"] += 1  # Add to HUD amounts
-            elif self.name == "emerald_ore":
-                hud.amounts["emerald"] += 1  # Add to HUD amounts
-            elif self.name == "redstone_ore":
-                hud.amounts["redstone"] += random.randint(4, 5)  # Add to HUD amounts
-            elif self.name == "lapis_ore":
-                hud.amounts["lapis_lazuli"] += random.randint(4, 8)  # Add to HUD amounts
-
-    def draw(self, screen, camera):
-        """Draw block at its position"""
-
-        if(self.destroyed):
+        self.next_heal_time = None  # When the block heals next (None until it is damaged)
+        self.heal_entry = None
+        self.broken = False  # Queued for removal
+
+    @property
+    def name(self):
+        return BLOCK_NAMES[self.chunk.types[self.index]]
+
+    @property
+    def max_hp(self):
+        return BLOCK_MAX_HP[self.chunk.types[self.index]]
+
+    @property
+    def hp(self):
+        return self.chunk.hp[self.index]
+
+    @hp.setter
+    def hp(self, value):
+        self.chunk.hp[self.index] = value
+
+    def hit(self, damage, current_time):
+        """Direct hit: reduce HP and restart the healing countdown."""
+        self.hp -= damage
+        if self._check_broken():
             return
+        _schedule(self, current_time + self.heal_interval)
 
-        block_x = self.body.position.x - camera.offset_x - BLOCK_SIZE // 2
-        block_y = self.body.position.y - camera.offset_y - BLOCK_SIZE // 2
-
-        screen.blit(self.texture, (block_x, block_y))
-
-        # Determine the destroy stage (0-9) based on hp percentage
-        if self.hp < self.max_hp:
-            damage_stage = int((1 - (self.hp / self.max_hp)) * 9)  # Scale hp to 0-9 range
-            damage_stage = min(damage_stage, 9)  # Ensure it doesn't exceed stage_9
-            
-            # Draw the destroy stage overlay
-            destroy_texture = self.destroy_textures[damage_stage]
-            screen.blit(destroy_texture, (block_x, block_y))
+    def damage(self, damage, current_time):
+        """Reduce HP without touching an already running healing countdown."""
+        self.hp -= damage
+        if self._check_broken():
+            return
+        if self.next_heal_time is None:
+            _schedule(self, current_time + self.heal_interval)
+
+    def resume(self, heal_time):
+        """Restore the healing countdown of a block loaded from a checkpoint."""
+        if not self._check_broken():
+            _schedule(self, heal_time)
+
+    def _check_broken(self):
+        # Queue the block for removal once, when its HP first drops to 0
+        if self.hp > 0:
+            return False
+        if not self.broken:
+            self.broken = True
+            _destroyed_queue.append(self)
+        return True
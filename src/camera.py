@@ -6,6 +6,7 @@ class Camera:
     def __init__(self):
         self.offset_y = 0  # Vertical offset
         self.offset_x = 0  # Horizontal offset
+        self.scale = 1  # Screen pixels per world pixel
         self.shake_timer = 0
         self.shake_intensity = 0
 
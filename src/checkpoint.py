@@ -0,0 +1,149 @@
+import json
+import os
+import struct
+import threading
+import zlib
+from array import array
+
+# File layout: header, then a zlib compressed body made of a JSON meta section
+# (pickaxe, HUD, TNT, timers) followed by the raw chunk arrays.
+MAGIC = b"FPCK"
+VERSION = 1
+_HEADER = struct.Struct("<4sH")  # magic, version
+_META_LENGTH = struct.Struct("<I")
+_CHUNK_HEADER = struct.Struct("<iiII")  # chunk_x, chunk_y, cells, healing blocks
+_HEALING = struct.Struct("<Hi")  # cell index, ms until the next heal
+
+def snapshot(chunks, pickaxe, hud, tnt_list, timers, current_time):
+    """
+    Capture the world state. Cheap enough for the main thread: arrays are copied as bytes
+    and every time is stored relative to `current_time`.
+
+    :param chunks: Loaded chunks, keyed by (chunk_x, chunk_y).
+    :param timers: Dict of the main loop timers, already relative to `current_time`.
+    :return: (meta dict, list of chunk records) to pass to `encode`.
+    """
+    meta = {
+        "pickaxe": {
+            "name": pickaxe.name,
+            "position": tuple(pickaxe.body.position),
+            "velocity": tuple(pickaxe.body.velocity),
+            "angle": pickaxe.body.angle,
+            "angular_velocity": pickaxe.body.angular_velocity,
+            "enlarged_ms": max(0, pickaxe.enlarge_end_time - current_time) if pickaxe.is_enlarged else 0,
+        },
+        "amounts": dict(hud.amounts),
+        "tnt": [
+            {
+                "name": tnt.name,
+                "owner": tnt.owner_name,
+                "position": tuple(tnt.body.position),
+                "velocity": tuple(tnt.body.velocity),
+                "angle": tnt.body.angle,
+                "angular_velocity": tnt.body.angular_velocity,
+                "age_ms": current_time - tnt.spawn_time,
+            }
+            for tnt in tnt_list if not tnt.detonated
+        ],
+        "timers": timers,
+    }
+
+    chunk_records = []
+    for (chunk_x, chunk_y), chunk in chunks.items():
+        healing = [(index, block.next_heal_time - current_time if block.next_heal_time is not None else 0)
+                   for index, block in chunk.blocks.items()]
+        chunk_records.append((chunk_x, chunk_y, chunk.types.tobytes(), chunk.hp.tobytes(), healing))
+    return meta, chunk_records
+
+def encode(meta, chunk_records):
+    """Pack a snapshot into the checkpoint file format."""
+    meta_bytes = json.dumps(meta).encode("utf-8")
+    parts = [_META_LENGTH.pack(len(meta_bytes)), meta_bytes, _META_LENGTH.pack(len(chunk_records))]
+    for chunk_x, chunk_y, types, hp, healing in chunk_records:
+        parts.append(_CHUNK_HEADER.pack(chunk_x, chunk_y, len(types), len(healing)))
+        parts.append(types)
+        parts.append(hp)
+        for index, heal_in in healing:
+            parts.append(_HEALING.pack(index, int(heal_in)))
+    return _HEADER.pack(MAGIC, VERSION) + zlib.compress(b"".join(parts), 1)
+
+def decode(data):
+    """
+    Unpack a checkpoint file.
+
+    :return: (meta dict, list of (chunk_x, chunk_y, types array, hp array, healing list))
+    :raises ValueError: If the data is not a checkpoint of this version.
+    """
+    magic, version = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a checkpoint of a supported version")
+    body = zlib.decompress(data[_HEADER.size:])
+
+    offset = 0
+    (meta_length,) = _META_LENGTH.unpack_from(body, offset)
+    offset += _META_LENGTH.size
+    meta = json.loads(body[offset:offset + meta_length].decode("utf-8"))
+    offset += meta_length
+
+    (chunk_count,) = _META_LENGTH.unpack_from(body, offset)
+    offset += _META_LENGTH.size
+    chunk_records = []
+    for _ in range(chunk_count):
+        chunk_x, chunk_y, cells, healing_count = _CHUNK_HEADER.unpack_from(body, offset)
+        offset += _CHUNK_HEADER.size
+        types = array("B")
+        types.frombytes(body[offset:offset + cells])
+        offset += cells
+        hp = array("d")
+        hp.frombytes(body[offset:offset + cells * hp.itemsize])
+        offset += cells * hp.itemsize
+        healing = []
+        for _ in range(healing_count):
+            healing.append(_HEALING.unpack_from(body, offset))
+            offset += _HEALING.size
+        chunk_records.append((chunk_x, chunk_y, types, hp, healing))
+    return meta, chunk_records
+
+def load_checkpoint(path):
+    """Read a checkpoint, or return None if there is none or it can't be read."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            return decode(f.read())
+    except (OSError, ValueError, struct.error, zlib.error) as e:
+        print("Ignoring unreadable checkpoint:", e)
+        return None
+
+class CheckpointWriter:
+    """Encodes and writes checkpoints on a background thread, one at a time."""
+
+    def __init__(self, path):
+        self.path = path
+        self._thread = None
+
+    def save(self, meta, chunk_records):
+        """
+        Start writing a snapshot. Skipped if the previous write is still running.
+
+        :return: True if the write was started.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return False
+        self._thread = threading.Thread(target=self._write, args=(meta, chunk_records), daemon=True)
+        self._thread.start()
+        return True
+
+    def wait(self):
+        """Block until the current write is finished."""
+        if self._thread is not None:
+            self._thread.join()
+
+    def _write(self, meta, chunk_records):
+        data = encode(meta, chunk_records)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Write next to the old checkpoint and swap, so a crash mid-write never leaves a broken file
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, self.path)
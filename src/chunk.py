@@ -1,42 +1,28 @@
+import heapq
 import pygame
+import pymunk
 import random
-from block import Block
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from itertools import accumulate
+from block import AIR, BLOCK_IDS, BLOCK_NAMES, BLOCK_MAX_HP, Block, block_textures, damage_stage, destroy_stage_textures
+from collisions import BLOCK
 from constants import BLOCK_SIZE, CHUNK_HEIGHT, CHUNK_WIDTH, SEED
+from physics import registry
 
-def generate_noise_ranges(block_weights):
+def generate_weight_table(block_weights):
     """
-    Generate noise value ranges based on block rarity weights.
-    
+    Build a cumulative weight lookup table from block rarity weights.
+
     :param block_weights: Dict of block names and their rarity weights.
                           Higher values mean more common.
-    :return: List of (block_name, min_value, max_value)
+    :return: (block type ids, cumulative weights) sorted from most to least common
     """
     sorted_blocks = sorted(block_weights.items(), key=lambda x: x[1], reverse=True)  # Sort by weight
-    total_weight = sum(block_weights.values())  # Get total weight
-    min_noise = -1.0  # Start from minimum noise value
-    noise_ranges = []
-
-    for block, weight in sorted_blocks:
-        range_size = (weight / total_weight) * 2.0  # Scale to noise range (-1 to 1)
-        max_noise = min_noise + range_size
-        noise_ranges.append((block, min_noise, max_noise))
-        min_noise = max_noise  # Move to next range
-
-    return noise_ranges
-
-
-def get_block_for_noise(noise_value, noise_ranges):
-    """
-    Get the corresponding block based on a noise value.
-    
-    :param noise_value: The Perlin noise value (-1 to 1)
-    :param noise_ranges: List of (block_name, min_value, max_value)
-    :return: Block name corresponding to the noise value
-    """
-    for block, min_val, max_val in noise_ranges:
-        if min_val <= noise_value < max_val:
-            return block
-    return "stone"  # Default fallback
+    block_ids = [BLOCK_IDS[block] for block, _ in sorted_blocks]
+    cum_weights = list(accumulate(weight for _, weight in sorted_blocks))
+    return block_ids, cum_weights
 
 block_weights = {
     "stone": 40,  
@@ -56,111 +42,422 @@ block_weights = {
     "cobblestone": 20
 }
 
-# Generate noise ranges
-noise_ranges = generate_noise_ranges(block_weights)
+# Generate the lookup table
+weighted_block_ids, cumulative_weights = generate_weight_table(block_weights)
+
+BEDROCK = BLOCK_IDS["bedrock"]
+
+# The outer columns of every chunk are left as air: the bedrock side walls cover them (see walls.py)
 
-def generate_first_chunk(texture_atlas, atlas_items, space): 
-    chunk = []
+def generate_first_chunk():
+    types = []
     for y in range(CHUNK_HEIGHT):
-        row = []
         for x in range(CHUNK_WIDTH):
             if(x == 0 or x == CHUNK_WIDTH - 1):
-                block_x = (0 * CHUNK_WIDTH + x) * BLOCK_SIZE
-                block_y = (0 * CHUNK_HEIGHT + y) * BLOCK_SIZE
-                row.append(Block(space, block_x, block_y, "bedrock", texture_atlas, atlas_items))
-                continue
+                types.append(AIR)
             elif y == 0:
-                block_x = (0 * CHUNK_WIDTH + x) * BLOCK_SIZE
-                block_y = (0 * CHUNK_HEIGHT + y) * BLOCK_SIZE
-                row.append(Block(space, block_x, block_y, "bedrock", texture_atlas, atlas_items))
-                continue
+                types.append(BEDROCK)
             elif y == CHUNK_HEIGHT - 2:
-                block_x = (0 * CHUNK_WIDTH + x) * BLOCK_SIZE
-                block_y = (0 * CHUNK_HEIGHT + y) * BLOCK_SIZE
-                row.append(Block(space, block_x, block_y, "grass_block", texture_atlas, atlas_items))
-                continue
+                types.append(BLOCK_IDS["grass_block"])
             elif y == CHUNK_HEIGHT - 1:
-                block_x = (0 * CHUNK_WIDTH + x) * BLOCK_SIZE
-                block_y = (0 * CHUNK_HEIGHT + y) * BLOCK_SIZE
-                row.append(Block(space, block_x, block_y, "dirt", texture_atlas, atlas_items))
-                continue
-            row.append(None)
-        chunk.append(row)
-    return chunk
+                types.append(BLOCK_IDS["dirt"])
+            else:
+                types.append(AIR)
+    return types
 
-def generate_side_chunk(chunk_x, chunk_y, texture_atlas, atlas_items, space):
-    chunk = []
-    for y in range(CHUNK_HEIGHT):
-        row = []
-        for x in range(CHUNK_WIDTH):
-            block_x = (chunk_x * CHUNK_WIDTH + x) * BLOCK_SIZE
-            block_y = (chunk_y * CHUNK_HEIGHT + y) * BLOCK_SIZE
-            row.append(Block(space, block_x, block_y, "bedrock", texture_atlas, atlas_items))
-        chunk.append(row)
-    return chunk
+def chunk_rng(chunk_x, chunk_y):
+    """
+    Create the random generator for a chunk.
 
-# Function to generate chunks using Perlin noise
-def generate_chunk(chunk_x, chunk_y, texture_atlas, atlas_items, space):
+    The generator only depends on SEED and the chunk coordinates, so a chunk always
+    gets the same contents no matter what else used `random` before it was generated.
+    """
+    return random.Random(f"{SEED}:{chunk_x}:{chunk_y}")
+
+def generate_chunk(chunk_x, chunk_y):
+    """Generate the block type ids of a chunk, row by row."""
     if(chunk_y <= 0):
-        return generate_first_chunk(texture_atlas, atlas_items, space)
+        return generate_first_chunk()
 
-    chunk = []
-    for y in range(CHUNK_HEIGHT):
-        row = []
-        for x in range(CHUNK_WIDTH):
-            block_x = (0 * CHUNK_WIDTH + x) * BLOCK_SIZE
-            block_y = (chunk_y * CHUNK_HEIGHT + y) * BLOCK_SIZE
+    # Draw every inner cell of the chunk in one pass against the cumulative weight table
+    inner_width = CHUNK_WIDTH - 2
+    rng = chunk_rng(chunk_x, chunk_y)
+    inner = rng.choices(weighted_block_ids, cum_weights=cumulative_weights, k=inner_width * CHUNK_HEIGHT)
 
-            if(x == 0 or x == CHUNK_WIDTH - 1):
-                row.append(Block(space, block_x, block_y, "bedrock", texture_atlas, atlas_items))
+    types = []
+    for y in range(0, len(inner), inner_width):
+        types.append(AIR)
+        types.extend(inner[y:y + inner_width])
+        types.append(AIR)
+    return types
+
+def merge_cells(types, x0=0, y0=0, x1=CHUNK_WIDTH, y1=CHUNK_HEIGHT):
+    """
+    Cover the solid cells inside a region of a chunk with as few rectangles as possible.
+
+    Greedy: take the longest run of solid cells in a row, then grow it down while the
+    rows below are solid across the whole run.
+
+    :param types: Block type ids of the chunk, indexed by y * CHUNK_WIDTH + x
+    :return: List of (x0, y0, x1, y1) cell rectangles, end exclusive
+    """
+    covered = set()
+
+    def free(x, y):
+        index = y * CHUNK_WIDTH + x
+        return types[index] != AIR and index not in covered
+
+    rects = []
+    for y in range(y0, y1):
+        x = x0
+        while x < x1:
+            if not free(x, y):
+                x += 1
                 continue
 
-            noise_value = random.uniform(-1, 1)
+            end_x = x
+            while end_x < x1 and free(end_x, y):
+                end_x += 1
 
-            # Block selection based on noise val
-            row.append(Block(space, block_x, block_y, get_block_for_noise(noise_value, noise_ranges), texture_atlas, atlas_items))
+            end_y = y + 1
+            while end_y < y1 and all(free(run_x, end_y) for run_x in range(x, end_x)):
+                end_y += 1
 
-        chunk.append(row)
-    return chunk
+            for cell_y in range(y, end_y):
+                for cell_x in range(x, end_x):
+                    covered.add(cell_y * CHUNK_WIDTH + cell_x)
+            rects.append((x, y, end_x, end_y))
+            x = end_x
+    return rects
+
+class Chunk:
+    """
+    A CHUNK_WIDTH x CHUNK_HEIGHT grid of blocks.
+
+    Block type ids and HP are kept in flat arrays indexed by y * CHUNK_WIDTH + x.
+    Solid cells are merged into a few box shapes on the chunk's single static body,
+    and `Block` objects holding healing timers are only created for damaged cells.
+    """
+
+    def __init__(self, chunk_x, chunk_y, types):
+        self.chunk_x = chunk_x
+        self.chunk_y = chunk_y
+        self.types = array("B", types)
+        self.hp = array("d", (BLOCK_MAX_HP[block_type] for block_type in self.types))
+        self.blocks = {}  # Cell index -> Block, only for damaged cells
+        self.shapes = set()  # Merged collision shapes
+        self.cell_shapes = [None] * len(self.types)  # Cell index -> shape covering it
+
+        # World position of the chunk's top left corner
+        self.origin = (chunk_x * CHUNK_WIDTH * BLOCK_SIZE, chunk_y * CHUNK_HEIGHT * BLOCK_SIZE)
+        self.body = None
+
+        # Pre-rendered blocks, created on the first draw. Only dirty cells are redrawn.
+        # A chunk covers the whole screen, so this is 1080x1920 RGBA (about 8 MB) at scale 1:
+        # only the few visible chunks have one, it is dropped when the chunk is unloaded.
+        self.surface = None
+        self.drawn_stages = array("b", [-1] * len(self.types))  # Destroy stage drawn per cell (-1 for none)
+        self.dirty = set()
+
+    def attach(self, space):
+        """
+        Create the chunk's static body and the shapes of all solid cells, and add them to the space.
+
+        Must run on the main thread: pymunk hands out body and shape ids without locking.
+        """
+        # One static body for the whole chunk, placed at its top left corner
+        self.body = pymunk.Body(body_type=pymunk.Body.STATIC)
+        self.body.position = self.origin
+
+        shapes = self._create_shapes(merge_cells(self.types))
+        registry(space).add(self.body, *shapes)
+
+    def _create_shapes(self, rects):
+        shapes = []
+        for rect in rects:
+            x0, y0, x1, y1 = rect
+            shape = pymunk.Poly.create_box_bb(self.body, pymunk.BB(x0 * BLOCK_SIZE, y0 * BLOCK_SIZE, x1 * BLOCK_SIZE, y1 * BLOCK_SIZE))
+            shape.elasticity = 1  # No bounce
+            shape.collision_type = BLOCK
+            shape.friction = 1
+            shape.chunk_ref = self  # Reference to the chunk and the cells the shape covers
+            shape.cells = rect
+            for y in range(y0, y1):
+                for x in range(x0, x1):
+                    self.cell_shapes[y * CHUNK_WIDTH + x] = shape
+            shapes.append(shape)
+        self.shapes.update(shapes)
+        return shapes
+
+    def detach(self, space):
+        """Remove the chunk's body and shapes from the space."""
+        _remove_from_space(space, self.body, *self.shapes)
+        self.shapes.clear()
+        self.blocks.clear()  # Pending heals of an unloaded chunk are dropped
+
+    def hit_cell(self, shape, point):
+        """
+        Find the cell of a merged shape that was hit at a contact point.
+
+        :param shape: One of this chunk's shapes
+        :param point: World position of the contact, on or slightly inside the shape
+        :return: Cell index
+        """
+        x0, y0, x1, y1 = shape.cells
+        x = min(max(int((point.x - self.origin[0]) // BLOCK_SIZE), x0), x1 - 1)
+        y = min(max(int((point.y - self.origin[1]) // BLOCK_SIZE), y0), y1 - 1)
+        return y * CHUNK_WIDTH + x
+
+    def cell_center(self, index):
+        """World position of the center of a cell."""
+        x, y = index % CHUNK_WIDTH, index // CHUNK_WIDTH
+        return ((self.chunk_x * CHUNK_WIDTH + x) * BLOCK_SIZE + BLOCK_SIZE // 2,
+                (self.chunk_y * CHUNK_HEIGHT + y) * BLOCK_SIZE + BLOCK_SIZE // 2)
+
+    def block(self, index):
+        """Get the damage state of a cell, creating it the first time the cell is hit."""
+        block = self.blocks.get(index)
+        if block is None:
+            block = Block(self, index)
+            self.blocks[index] = block
+        return block
+
+    def remove_cell(self, index, space):
+        """Turn a cell into air and rebuild the collision shape that covered it."""
+        self.remove_cells([index], space)
+
+    def remove_cells(self, indices, space):
+        """Turn cells into air and rebuild the collision shapes that covered them in one go."""
+        old_shapes = set()
+        for index in indices:
+            self.types[index] = AIR
+            self.hp[index] = 0
+            self.blocks.pop(index, None)
+            self.dirty.add(index)
+            if self.cell_shapes[index] is not None:
+                old_shapes.add(self.cell_shapes[index])
+
+        if not old_shapes:
+            return
+
+        # Only the rectangles containing the cells change: split them into new ones
+        for shape in old_shapes:
+            x0, y0, x1, y1 = shape.cells
+            for y in range(y0, y1):
+                for x in range(x0, x1):
+                    self.cell_shapes[y * CHUNK_WIDTH + x] = None
+            self.shapes.discard(shape)
+        _remove_from_space(space, *old_shapes)
+
+        if self.body is not None and space is not None:
+            new_shapes = []
+            for shape in old_shapes:
+                new_shapes.extend(self._create_shapes(merge_cells(self.types, *shape.cells)))
+            registry(space).add(*new_shapes)
+
+    def release_block(self, index):
+        """Stop tracking the damage state of a fully healed cell."""
+        self.blocks.pop(index, None)
+        self.dirty.add(index)
+
+    def refresh(self, texture_atlas, atlas_items, camera):
+        """
+        Redraw the cells that changed into the cached surface.
+
+        The surface is drawn at `camera.scale`, with textures from an atlas of that scale.
+
+        :return: Screen rects of the redrawn cells
+        """
+        cell_size = round(BLOCK_SIZE * camera.scale)
+        if self.surface is None or self.surface.get_width() != CHUNK_WIDTH * cell_size:
+            self.surface = pygame.Surface((CHUNK_WIDTH * cell_size, CHUNK_HEIGHT * cell_size), pygame.SRCALPHA)
+            self.dirty.update(index for index, block_type in enumerate(self.types) if block_type != AIR)
+
+        # Damaged cells whose destroy stage changed since they were drawn
+        for index in self.blocks:
+            stage = damage_stage(self.hp[index], BLOCK_MAX_HP[self.types[index]])
+            if (stage if stage is not None else -1) != self.drawn_stages[index]:
+                self.dirty.add(index)
+
+        if not self.dirty:
+            return []
+        # Same rounding as the blit in `draw`
+        x, y = self.screen_position(camera)
+        rects = [pygame.Rect(x + (index % CHUNK_WIDTH) * cell_size, y + (index // CHUNK_WIDTH) * cell_size, cell_size, cell_size)
+                 for index in self.dirty]
+        self._redraw_cells(texture_atlas, atlas_items, cell_size)
+        return rects
+
+    def screen_position(self, camera):
+        """Where the top left corner of the chunk is drawn."""
+        return (int((self.origin[0] - camera.offset_x) * camera.scale), int((self.origin[1] - camera.offset_y) * camera.scale))
+
+    def draw(self, screen, camera, texture_atlas, atlas_items):
+        """Draw the chunk from its cached surface, redrawing the cells that changed"""
+        self.refresh(texture_atlas, atlas_items, camera)
+        screen.blit(self.surface, self.screen_position(camera))
+
+    def _redraw_cells(self, texture_atlas, atlas_items, cell_size):
+        textures = block_textures(texture_atlas, atlas_items)
+        destroy_textures = destroy_stage_textures(texture_atlas, atlas_items)
+
+        for index in self.dirty:
+            block_type = self.types[index]
+            cell_rect = pygame.Rect((index % CHUNK_WIDTH) * cell_size, (index // CHUNK_WIDTH) * cell_size, cell_size, cell_size)
+            self.surface.fill((0, 0, 0, 0), cell_rect)
+            self.drawn_stages[index] = -1
+
+            if block_type == AIR:
+                continue
+            self.surface.blit(textures[block_type], cell_rect)
+
+            # Draw the destroy stage overlay
+            stage = damage_stage(self.hp[index], BLOCK_MAX_HP[block_type])
+            if stage is not None:
+                self.surface.blit(destroy_textures[stage], cell_rect)
+                self.drawn_stages[index] = stage
+        self.dirty.clear()
 
 # Store generated chunks
 chunks = {}
 
-def _remove_block_from_space(block, space):
-    if block is None or space is None:
-        return
-    try:
-        if block.body in space.bodies or block.shape in space.shapes:
-            space.remove(block.body, block.shape)
-    except Exception:
-        pass
-
-def get_block(chunk_x, chunk_y, x, y, texture_atlas, atlas_items, space):
-    if chunk_y < 0:
+# Rows of the loaded chunks as a min heap of (chunk_y, chunk_x), so the rows to evict are
+# found without scanning `chunks`. Entries of chunks that are already gone are skipped.
+_rows = []
+
+# Chunks out of range whose bodies are still in the space, oldest first
+_evicting = {}
+
+# Chunks being generated in the background, keyed like `chunks`
+_pending = {}
+_generation_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chunk-gen")
+
+def _build_chunk(chunk_x, chunk_y):
+    return Chunk(chunk_x, chunk_y, generate_chunk(chunk_x, chunk_y))
+
+def _remove_from_space(space, *objects):
+    if space is not None:
+        registry(space).remove(*objects)
+
+def _store_chunk(key, chunk):
+    chunks[key] = chunk
+    heapq.heappush(_rows, (key[1], key[0]))
+
+def get_chunk(chunk_x, chunk_y, space):
+    """Get a chunk, generating it and adding it to the space the first time it is needed."""
+    # Only the shaft has chunks, everything beside it is bedrock wall
+    if chunk_y < 0 or chunk_x != 0:
         return None
 
     if (chunk_x, chunk_y) not in chunks:
-        if(chunk_x == 0):
-            chunks[(chunk_x, chunk_y)] = generate_chunk(chunk_x, chunk_y, texture_atlas, atlas_items, space)
-        else:
-            chunks[(chunk_x, chunk_y)] = generate_side_chunk(chunk_x, chunk_y, texture_atlas, atlas_items, space)
-            
-    return chunks[(chunk_x, chunk_y)][y][x]
+        chunk = _evicting.pop((chunk_x, chunk_y), None)
+        if chunk is None:
+            # Use the background result if the chunk was prefetched (waits if it is still running)
+            future = _pending.pop((chunk_x, chunk_y), None)
+            chunk = future.result() if future is not None else _build_chunk(chunk_x, chunk_y)
+            chunk.attach(space)
+        _store_chunk((chunk_x, chunk_y), chunk)
+
+    return chunks[(chunk_x, chunk_y)]
+
+def restore_chunk(chunk_x, chunk_y, types, hp, healing, space, current_time):
+    """
+    Add a chunk loaded from a checkpoint, replacing any generated one.
+
+    :param healing: List of (cell index, ms until the next heal) of damaged cells
+    """
+    key = (chunk_x, chunk_y)
+    if key in chunks:
+        chunks.pop(key).detach(space)
+    if key in _evicting:
+        _evicting.pop(key).detach(space)
+    pending = _pending.pop(key, None)
+    if pending is not None:
+        pending.cancel()
+
+    chunk = Chunk(chunk_x, chunk_y, types)
+    chunk.hp = array("d", hp)
+    chunk.attach(space)
+    _store_chunk(key, chunk)
+    for index, heal_in in healing:
+        chunk.block(index).resume(current_time + heal_in)
+    return chunk
+
+def prefetch_chunks(start_chunk_y, end_chunk_y):
+    """Start generating the chunk rows in [start_chunk_y, end_chunk_y) in the background."""
+    for chunk_y in range(max(start_chunk_y, 0), end_chunk_y):
+        key = (0, chunk_y)
+        if key not in chunks and key not in _pending:
+            _pending[key] = _generation_pool.submit(_build_chunk, 0, chunk_y)
+
+def attach_ready_chunks(space, budget_ms):
+    """
+    Add finished background chunks to the space, top rows first, until the time budget is spent.
+
+    :return: Number of chunks attached
+    """
+    start = time.perf_counter()
+    attached = 0
+    for key in sorted(_pending, key=lambda key: key[1]):
+        if (time.perf_counter() - start) * 1000 >= budget_ms:
+            break
+        if not _pending[key].done():
+            continue
+        chunk = _pending.pop(key).result()
+        chunk.attach(space)
+        _store_chunk(key, chunk)
+        attached += 1
+    return attached
+
+def get_block(chunk_x, chunk_y, x, y, space):
+    """Get the name of the block at a cell, or None for air."""
+    chunk = get_chunk(chunk_x, chunk_y, space)
+    if chunk is None:
+        return None
+    return BLOCK_NAMES[chunk.types[y * CHUNK_WIDTH + x]]
 
 def delete_block(chunk_x, chunk_y, x, y, space=None):
     if (chunk_x, chunk_y) in chunks:
-        block = chunks[(chunk_x, chunk_y)][y][x]
-        if block is not None:
-            block.hp = 0
-            _remove_block_from_space(block, space)
-        del chunks[(chunk_x, chunk_y)][y][x]
-        chunks[(chunk_x, chunk_y)][y][x] = None
-
-def clean_chunks(start_chunk_y, space):
-    for (chunk_x, chunk_y) in list(chunks.keys()):
-        if chunk_y < start_chunk_y:
-            chunk = chunks[(chunk_x, chunk_y)]
-            for row in chunk:
-                for block in row:
-                    _remove_block_from_space(block, space)
-            del chunks[(chunk_x, chunk_y)]
+        chunks[(chunk_x, chunk_y)].remove_cell(y * CHUNK_WIDTH + x, space)
+
+def clean_chunks(start_chunk_y):
+    """
+    Unload the chunk rows above `start_chunk_y`.
+
+    The chunks stop being drawn and hit right away, but their bodies stay in the space until
+    `evict_chunks` removes them, so a whole row going out of range never lands in one frame.
+    """
+    while _rows and _rows[0][0] < start_chunk_y:
+        chunk_y, chunk_x = heapq.heappop(_rows)
+        chunk = chunks.pop((chunk_x, chunk_y), None)
+        if chunk is None:
+            continue  # Already unloaded or replaced
+        # Pending heals and breaks are dropped: the chunk comes back undamaged if it is needed again
+        for index in chunk.blocks:
+            chunk.hp[index] = BLOCK_MAX_HP[chunk.types[index]]
+            chunk.dirty.add(index)
+        chunk.blocks.clear()
+        chunk.surface = None  # Redrawn from scratch if the chunk comes back
+        _evicting[(chunk_x, chunk_y)] = chunk
+
+    # Forget background work for rows that are already out of range
+    for key in [key for key in _pending if key[1] < start_chunk_y]:
+        _pending.pop(key).cancel()
+
+def evict_chunks(space, budget_ms):
+    """
+    Remove unloaded chunks from the space, oldest first, until the time budget is spent.
+
+    At least one chunk is removed per call, so the queue always drains.
+
+    :return: Number of chunks removed
+    """
+    start = time.perf_counter()
+    evicted = 0
+    while _evicting:
+        if evicted and (time.perf_counter() - start) * 1000 >= budget_ms:
+            break
+        key = next(iter(_evicting))
+        _evicting.pop(key).detach(space)
+        evicted += 1
+    return evicted
@@ -0,0 +1,57 @@
+# Collision types of the shapes
+PICKAXE = 1
+BLOCK = 2
+TNT = 3
+WALL = 4
+
+# A contact that goes on counts as another hit above this impulse (a resting pickaxe pushes about 1700 per step)
+HIT_IMPULSE = 5000
+
+def setup(space):
+    """
+    Register the handlers of all collision type pairs, once per space.
+
+    Handlers find the entity a contact belongs to through `shape.entity_ref` (pickaxe and TNT)
+    and `shape.chunk_ref` (blocks), so entities never register handlers themselves.
+    """
+    if getattr(space, "collision_handlers", False):
+        return
+    space.collision_handlers = True
+
+    handler = space.add_collision_handler(PICKAXE, BLOCK)
+    handler.begin = _pickaxe_block_begin
+    handler.post_solve = _pickaxe_block_post_solve
+
+    handler = space.add_collision_handler(TNT, BLOCK)
+    handler.begin = _tnt_begin
+
+    # Walls are bedrock: hits sound and nudge like on blocks, but deal no damage
+    handler = space.add_collision_handler(PICKAXE, WALL)
+    handler.begin = _pickaxe_wall_begin
+    handler.post_solve = _pickaxe_wall_post_solve
+
+    handler = space.add_collision_handler(TNT, WALL)
+    handler.begin = _tnt_begin
+
+def _pickaxe_block_begin(arbiter, space, data):
+    pickaxe_shape, block_shape = arbiter.shapes
+    pickaxe_shape.entity_ref.hit(block_shape, arbiter)
+    return True
+
+def _pickaxe_block_post_solve(arbiter, space, data):
+    # The first step of a contact already counted as a hit in begin, later steps only count when hit hard
+    if not arbiter.is_first_contact and arbiter.total_impulse.length > HIT_IMPULSE:
+        pickaxe_shape, block_shape = arbiter.shapes
+        pickaxe_shape.entity_ref.hit(block_shape, arbiter)
+
+def _pickaxe_wall_begin(arbiter, space, data):
+    arbiter.shapes[0].entity_ref.hit_wall(arbiter)
+    return True
+
+def _pickaxe_wall_post_solve(arbiter, space, data):
+    if not arbiter.is_first_contact and arbiter.total_impulse.length > HIT_IMPULSE:
+        arbiter.shapes[0].entity_ref.hit_wall(arbiter)
+
+def _tnt_begin(arbiter, space, data):
+    arbiter.shapes[0].entity_ref.on_collision(arbiter)
+    return True
@@ -5,4 +5,10 @@ INTERNAL_WIDTH, INTERNAL_HEIGHT = 1080, 1920
 BLOCK_TEXTURE_SIZE = 16
 BLOCK_SCALE_FACTOR = INTERNAL_WIDTH / BLOCK_TEXTURE_SIZE / CHUNK_WIDTH
 BLOCK_SIZE = int(INTERNAL_WIDTH / CHUNK_WIDTH)
-FRAMERATE = 60
\ No newline at end of file
+FRAMERATE = 60
+PHYSICS_STEP_MS = 1000 / FRAMERATE  # Fixed simulation step, independent of the frame rate
+MAX_PHYSICS_STEPS = 8  # Steps per frame at most, a longer stall is not caught up
+FAST_SLOW_RATES = {"Fast": 2, "Slow": 0.5}  # Simulation speed while Fast or Slow is active
+CHUNK_PREFETCH_ROWS = 2  # Chunk rows generated in the background below the visible ones
+CHUNK_ATTACH_BUDGET_MS = 2  # Time per frame for adding prefetched chunks to the physics space
+CHUNK_EVICT_BUDGET_MS = 1  # Time per frame for removing unloaded chunks from the physics space
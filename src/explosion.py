@@ -1,83 +1,102 @@
 import pygame
 import random
+from array import array
 
-class ExplosionParticle:
-    def __init__(self, pos, texture_atlas, atlas_items, frame_count=16, frame_duration=1):
-        """
-        :param pos: Starting position (tuple or pygame.Vector2)
-        :param texture_atlas: The atlas surface containing the explosion frames.
-        :param atlas_items: A dict with keys like "explosion_0", "explosion_1", ... up to frame_count-1.
-        :param frame_count: Total number of explosion frames.
-        :param animation_duration: Total duration of the animation. Interpreted either in ms or frames.
-        :param duration_mode: Either 'ms' for milliseconds or 'frames' for game frames.
-        """
-        self.pos = pygame.Vector2(pos)
-        self.texture_atlas = texture_atlas
-        self.atlas_items = atlas_items
-        self.frame_count = frame_count
+FRAME_COUNT = 16  # Explosion animation frames in the atlas
+ROTATIONS = 16  # Pre-rotated copies of the animation, particles pick one at random
+FRAME_DURATION = 1  # Time per animation frame in ms (at most one frame is advanced per update)
+MAX_PARTICLES = 1024  # Particles beyond this are not spawned
+SPREAD = 200  # Particles start up to this far from the explosion center
 
-        self.elapsed_time = 0.0
-        self.frame_duration = frame_duration
-        self.current_frame = 0
-        self.finished = False
+_frame_bank_cache = {}
 
-        # Random rotation between 0 and 360 degrees.
-        self.rotation = random.uniform(0, 360)
-        self.frames = []
-        for i in range(self.frame_count):
-            key = f"explosion_{i}"
-            rect = pygame.Rect(self.atlas_items["particle"][key])
-            texture = self.texture_atlas.subsurface(rect)
-            texture = pygame.transform.rotate(texture, self.rotation)
-            self.frames.append(texture)
+def frame_banks(texture_atlas, atlas_items):
+    """
+    The explosion animation rotated ROTATIONS times, as one list of frames per rotation.
 
-    def update(self, dt_ms):
-        """Update animation frame based on elapsed time or frame count."""
-        if self.finished:
-            return
+    Built once per atlas and shared by all particles. Only the banks of the latest atlas are kept.
+    """
+    if texture_atlas not in _frame_bank_cache:
+        _frame_bank_cache.clear()
+        frames = [texture_atlas.subsurface(pygame.Rect(atlas_items["particle"][f"explosion_{i}"])) for i in range(FRAME_COUNT)]
+        _frame_bank_cache[texture_atlas] = [
+            [pygame.transform.rotate(frame, rotation * 360 / ROTATIONS) for frame in frames]
+            for rotation in range(ROTATIONS)
+        ]
+    return _frame_bank_cache[texture_atlas]
 
-        self.elapsed_time += dt_ms
-        if self.elapsed_time >= self.frame_duration:
-            self.elapsed_time -= self.frame_duration
-            self.current_frame += 1
+class ParticleSystem:
+    """
+    All explosion particles, stored as parallel arrays in a fixed size pool.
 
-            if self.current_frame >= self.frame_count:
-                self.finished = True
-                self.current_frame = self.frame_count - 1
+    Spawning a particle writes a few numbers instead of creating objects and surfaces,
+    and finished particles are compacted away in place, keeping the drawing order.
+    """
 
+    def __init__(self, texture_atlas, atlas_items, capacity=MAX_PARTICLES):
+        self.banks = frame_banks(texture_atlas, atlas_items)
+        self.capacity = capacity
+        self.count = 0
 
-    def draw(self, screen, camera):
-        if self.finished:
-            return
-        
-        # Adjust drawing position by camera offset (if only vertical, subtract camera.offset_y)
-        draw_pos = (self.pos.x - camera.offset_x, self.pos.y - camera.offset_y)
+        # One entry per particle slot, only the first `count` are alive
+        self.x = array("d", [0.0]) * capacity  # Top left position of the frame in the world
+        self.y = array("d", [0.0]) * capacity
+        self.elapsed = array("d", [0.0]) * capacity  # Time since the last frame change
+        self.frame = array("B", [0]) * capacity
+        self.bank = array("B", [0]) * capacity  # Which rotation the particle uses
+
+    def set_atlas(self, texture_atlas, atlas_items):
+        """Draw with the frames of another atlas, e.g. one scaled to the window size."""
+        self.banks = frame_banks(texture_atlas, atlas_items)
 
-        screen.blit(self.frames[self.current_frame], draw_pos)
+    def __len__(self):
+        return self.count
 
-class Explosion:
-    def __init__(self, pos, texture_atlas, atlas_items, particle_count=20):
+    def explode(self, position, particle_count=20):
         """
-        Creates an explosion effect at the given position.
-        :param pos: The center position of the explosion.
-        :param texture_atlas: The atlas surface.
-        :param atlas_items: The atlas items dictionary.
-        :param particle_count: Number of particles to spawn.
+        Spawn the particles of an explosion around `position`.
+
+        :return: Number of particles spawned (less than asked once the pool is full)
         """
-        self.particles = []
-        for _ in range(particle_count):
+        spawned = min(particle_count, self.capacity - self.count)
+        for i in range(self.count, self.count + spawned):
             # Give each particle a slight random offset around the explosion center
-            offset = pygame.Vector2(random.randint(-200, 200), random.randint(-200, 200))
-            particle = ExplosionParticle(pos + offset, texture_atlas, atlas_items)
-            self.particles.append(particle)
+            self.x[i] = position[0] + random.randint(-SPREAD, SPREAD)
+            self.y[i] = position[1] + random.randint(-SPREAD, SPREAD)
+            self.elapsed[i] = 0.0
+            self.frame[i] = 0
+            self.bank[i] = random.randrange(ROTATIONS)
+        self.count += spawned
+        return spawned
 
     def update(self, dt_ms):
-        for particle in self.particles:
-            particle.update(dt_ms)
+        """Advance the animations and remove the particles that finished."""
+        x, y, elapsed, frame, bank = self.x, self.y, self.elapsed, self.frame, self.bank
+        alive = 0
+        for i in range(self.count):
+            elapsed[i] += dt_ms
+            if elapsed[i] >= FRAME_DURATION:
+                elapsed[i] -= FRAME_DURATION
+                if frame[i] + 1 >= FRAME_COUNT:
+                    continue  # Finished
+                frame[i] += 1
 
-        # Optionally remove finished particles
-        self.particles = [p for p in self.particles if not p.finished]
+            if alive != i:
+                x[alive], y[alive], elapsed[alive], frame[alive], bank[alive] = x[i], y[i], elapsed[i], frame[i], bank[i]
+            alive += 1
+        self.count = alive
 
     def draw(self, screen, camera):
-        for particle in self.particles:
-            particle.draw(screen, camera)
+        """Draw all particles and return the rects they cover."""
+        banks = self.banks
+        scale = camera.scale
+        blits = []
+        rects = []
+        for i in range(self.count):
+            image = banks[self.bank[i]][self.frame[i]]
+            # Whole pixels, so the rect matches where the blit puts the frame
+            position = (int((self.x[i] - camera.offset_x) * scale), int((self.y[i] - camera.offset_y) * scale))
+            blits.append((image, position))
+            rects.append(image.get_rect(topleft=position))
+        screen.blits(blits, doreturn=False)
+        return rects
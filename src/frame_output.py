@@ -0,0 +1,99 @@
+import os
+import queue
+import sys
+import threading
+import pygame
+from constants import INTERNAL_HEIGHT, INTERNAL_WIDTH
+
+# 32 bit pixels stored as blue, green, red, unused on little endian machines ("bgr0" in ffmpeg)
+FRAME_MASKS = (0xFF0000, 0x00FF00, 0x0000FF, 0)
+PIXEL_FORMAT = "bgr0" if sys.byteorder == "little" else "0rgb"
+
+class FrameOutput:
+    """
+    Writes finished frames as raw pixels to stdout or a named pipe, for an encoder to read.
+
+    Frames are drawn into one of two surfaces while the other one is written on a background
+    thread straight from its pixel buffer, so no frame is copied. When the reader is slower
+    than the game, frames are dropped instead of making the main loop wait.
+    """
+
+    def __init__(self, target, size=(INTERNAL_WIDTH, INTERNAL_HEIGHT)):
+        """
+        :param target: Path of the pipe (created if it does not exist) or "-" for stdout.
+        :param size: Size of the frames in pixels.
+        """
+        self.target = target
+        self.size = size
+        self.written = 0
+        self.dropped = 0
+        self.closed = False
+
+        self._buffers = [pygame.Surface(size, 0, 32, FRAME_MASKS) for _ in range(2)]
+        self._back = 0  # Buffer the next frame is drawn into
+        self._idle = threading.Event()  # Set while the writer holds no buffer
+        self._idle.set()
+        self._frames = queue.Queue()
+
+        self._stream = None
+        if target == "-":
+            self._stream = sys.__stdout__.buffer  # Even if sys.stdout already points to stderr
+            sys.stdout = sys.stderr  # Messages would end up in the frames
+        elif not os.path.exists(target) and hasattr(os, "mkfifo"):
+            os.mkfifo(target)
+
+        print(f"Writing {size[0]}x{size[1]} {PIXEL_FORMAT} frames to {'stdout' if target == '-' else target}")
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def surface(self):
+        """The surface to draw the next frame into."""
+        return self._buffers[self._back]
+
+    def submit(self):
+        """
+        Hand the frame drawn into `surface` to the writer, unless it is still busy with the last one.
+
+        :return: True if the frame will be written, False if it was dropped.
+        """
+        if self.closed or not self._idle.is_set():
+            self.dropped += 1
+            return False
+        self._idle.clear()
+        self._frames.put(self.surface.get_view("0"))
+        self._back = 1 - self._back
+        return True
+
+    def close(self, timeout=1):
+        """Stop the writer after the frame it is writing."""
+        self._frames.put(None)
+        self._thread.join(timeout)  # A pipe nobody opened would block forever
+        print(f"Frame output: {self.written} frames written, {self.dropped} dropped")
+
+    def _run(self):
+        try:
+            if self._stream is None:
+                self._stream = open(self.target, "wb", buffering=0)  # Waits for the reader of a pipe
+
+            while True:
+                view = self._frames.get()
+                if view is None:
+                    break
+                data = memoryview(view).cast("B")
+                while data:
+                    data = data[self._stream.write(data):]
+                self._stream.flush()
+                self.written += 1
+                del data, view  # Unlocks the surface before the main loop draws into it again
+                self._idle.set()
+        except OSError as e:  # Includes the reader going away (BrokenPipeError)
+            print("Frame output stopped:", e)
+        finally:
+            self.closed = True
+            self._idle.set()
+            if self._stream is not None and self.target != "-":
+                try:
+                    self._stream.close()
+                except OSError:
+                    pass
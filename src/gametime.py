@@ -0,0 +1,52 @@
+import pygame
+
+# Simulated clock in milliseconds. None means the wall clock is used.
+_simulated_ticks = None
+
+def use_simulated_time(start_ticks=0):
+    """Switch the game clock from wall-clock time to simulated time."""
+    global _simulated_ticks
+    _simulated_ticks = start_ticks
+
+def advance(ms):
+    """Advance the simulated clock by the given amount of milliseconds."""
+    global _simulated_ticks
+    if _simulated_ticks is not None:
+        _simulated_ticks += ms
+
+def get_ticks():
+    """Milliseconds since the game started (wall clock or simulated)."""
+    if _simulated_ticks is not None:
+        return int(_simulated_ticks)
+    return pygame.time.get_ticks()
+
+class FixedStep:
+    """
+    Turns the time of each frame into a whole number of fixed size simulation steps.
+
+    Leftover time is carried over to the next frame. After a long stall at most `max_steps`
+    are run and the rest is dropped, so the simulation never falls further and further behind.
+    """
+
+    def __init__(self, step_ms, max_steps):
+        self.step_ms = step_ms
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+
+    def steps(self, frame_ms, rate=1):
+        """
+        :param frame_ms: Time the last frame took.
+        :param rate: Simulated time per real time (2 runs the simulation twice as fast).
+        :return: Number of steps to run this frame.
+        """
+        self.accumulator += frame_ms * rate
+        steps = min(int(self.accumulator // self.step_ms), self.max_steps)
+        self.accumulator -= steps * self.step_ms
+        if steps == self.max_steps:
+            self.accumulator = min(self.accumulator, self.step_ms)  # Drop what could not be caught up
+        return steps
+
+    @property
+    def alpha(self):
+        """How far the simulation is between the last step and the next one (0 to 1), for interpolation."""
+        return min(self.accumulator / self.step_ms, 1)
@@ -1,24 +1,6 @@
 import pygame
-from constants import BLOCK_SIZE, CHUNK_HEIGHT
-
-def render_text_with_outline(text, font, text_color, outline_color, outline_width=2):
-    # Render the text in the main color.
-    text_surface = font.render(text, True, text_color)
-    # Create a new surface larger than the text surface to hold the outline.
-    w, h = text_surface.get_size()
-    outline_surface = pygame.Surface((w + 2*outline_width, h + 2*outline_width), pygame.SRCALPHA)
-    
-    # Blit the text multiple times in the outline color, offset by outline_width in every direction.
-    for dx in range(-outline_width, outline_width+1):
-        for dy in range(-outline_width, outline_width+1):
-            # Only draw outline if offset is non-zero (avoids overdraw, though it's not a big deal)
-            if dx != 0 or dy != 0:
-                pos = (dx + outline_width, dy + outline_width)
-                outline_surface.blit(font.render(text, True, outline_color), pos)
-    
-    # Blit the main text in the center.
-    outline_surface.blit(text_surface, (outline_width, outline_width))
-    return outline_surface
+from constants import BLOCK_SIZE, CHUNK_HEIGHT, INTERNAL_HEIGHT, INTERNAL_WIDTH
+from text import draw_outlined, outlined
 
 class Hud:
     def __init__(self, texture_atlas, atlas_items, position=(32, 32)):
@@ -48,6 +30,7 @@ class Hud:
 
         # Initialize a font (using the default font and size 24)
         self.font = pygame.font.Font(None, 64)
+        self.text_height = self.font.get_height() + 4  # Height of text with a 2px outline
         self.icon_cache = {}
         for ore in self.amounts:
             if ore in self.atlas_items["item"]:
@@ -56,11 +39,9 @@ class Hud:
                 icon = pygame.transform.scale(icon, self.icon_size)
                 self.icon_cache[ore] = icon
 
-        self.amount_text_cache = {}
-        self.pickaxe_y_cache = None
-        self.pickaxe_indicator_surface = None
-        self.fast_slow_cache = None
-        self.fast_slow_surface = None
+        # HUD drawn at internal size and scaled, see draw_scaled
+        self.layer = None
+        self.scaled = None  # (state and scale it shows, surface, rect at internal size)
 
     def update_amounts(self, new_amounts):
         """
@@ -69,52 +50,64 @@ class Hud:
         """
         self.amounts.update(new_amounts)
 
+    def state(self, pickaxe_y, fast_slow_active, fast_slow):
+        """Everything the HUD shows, to tell whether it has to be drawn again."""
+        return (tuple(self.amounts.values()), -int(pickaxe_y // BLOCK_SIZE), fast_slow if fast_slow_active else "Normal")
+
     def draw(self, screen, pickaxe_y, fast_slow_active, fast_slow):
         """
         Draws the HUD: each ore icon with its amount and other indicators.
+
+        :return: The rect covered by the HUD.
         """
         x, y = self.position
+        drawn = pygame.Rect(x, y, 0, 0)
 
         for ore, amount in self.amounts.items():
             # Retrieve the icon rect from atlas_items["item"][ore]
             if ore in self.icon_cache:
-                screen.blit(self.icon_cache[ore], (x, y))
+                drawn.union_ip(screen.blit(self.icon_cache[ore], (x, y)))
             else:
                 # In case the ore key is missing, skip drawing the icon
                 continue
 
-            text_surface = self.amount_text_cache.get(ore)
-            if text_surface is None or text_surface[0] != amount:
-                text = str(amount)
-                text_surface = (amount, render_text_with_outline(text, self.font, (255, 255, 255), (0, 0, 0), outline_width=2))
-                self.amount_text_cache[ore] = text_surface
-            
-            # Position text to the right of the icon
+            # Amounts change all the time, so they are drawn from cached digit glyphs
             text_x = x + self.icon_size[0] + self.spacing
-            text_y = y + (self.icon_size[1] - text_surface[1].get_height()) // 2 + 3
-            screen.blit(text_surface[1], (text_x, text_y))
+            text_y = y + (self.icon_size[1] - self.text_height) // 2 + 3
+            drawn.union_ip(draw_outlined(screen, str(amount), (text_x, text_y), self.font))
 
             # Move to the next line
             y += self.icon_size[1] + self.spacing
 
         # Draw the pickaxe position indicator with outlined text
         pickaxe_y_display = -int(pickaxe_y // BLOCK_SIZE)
-        if self.pickaxe_y_cache != pickaxe_y_display:
-            pickaxe_indicator_text = f"Y: {pickaxe_y_display}"
-            self.pickaxe_indicator_surface = render_text_with_outline(pickaxe_indicator_text, self.font, (255, 255, 255), (0, 0, 0), outline_width=2)
-            self.pickaxe_y_cache = pickaxe_y_display
         pickaxe_indicator_x = x + self.spacing
         pickaxe_indicator_y = y + self.spacing
-        screen.blit(self.pickaxe_indicator_surface, (pickaxe_indicator_x, pickaxe_indicator_y))
+        drawn.union_ip(draw_outlined(screen, f"Y: {pickaxe_y_display}", (pickaxe_indicator_x, pickaxe_indicator_y), self.font))
 
         # Draw the fast/slow indicator with outlined text
-        fast_slow_text = f"{fast_slow}" if fast_slow_active else "Normal"
-        if self.fast_slow_cache != fast_slow_text:
-            self.fast_slow_surface = render_text_with_outline(fast_slow_text, self.font, (255, 255, 255), (0, 0, 0), outline_width=2)
-            self.fast_slow_cache = fast_slow_text
+        fast_slow_surface = outlined(f"{fast_slow}" if fast_slow_active else "Normal", self.font)
         fast_slow_x = x + self.spacing
-        fast_slow_y = y + 2 * self.spacing + self.fast_slow_surface.get_height()
-        screen.blit(self.fast_slow_surface, (fast_slow_x, fast_slow_y))
+        fast_slow_y = y + 2 * self.spacing + fast_slow_surface.get_height()
+        drawn.union_ip(screen.blit(fast_slow_surface, (fast_slow_x, fast_slow_y)))
+        return drawn
+
+    def draw_scaled(self, screen, scale, pickaxe_y, fast_slow_active, fast_slow):
+        """
+        Draws the HUD `scale` times bigger, when drawing at window resolution.
+
+        The HUD is drawn at its normal size and scaled only when what it shows changed.
 
-            
+        :return: The rect covered by the HUD.
+        """
+        key = (self.state(pickaxe_y, fast_slow_active, fast_slow), scale)
+        if self.scaled is None or self.scaled[0] != key:
+            if self.layer is None:
+                self.layer = pygame.Surface((INTERNAL_WIDTH, INTERNAL_HEIGHT), pygame.SRCALPHA)
+            self.layer.fill((0, 0, 0, 0))
+            rect = self.draw(self.layer, pickaxe_y, fast_slow_active, fast_slow).clip(self.layer.get_rect())
+            size = (round(rect.w * scale), round(rect.h * scale))
+            self.scaled = (key, pygame.transform.scale(self.layer.subsurface(rect), size), rect)
 
+        _, surface, rect = self.scaled
+        return screen.blit(surface, (round(rect.x * scale), round(rect.y * scale)))
@@ -1,17 +1,57 @@
+import argparse
+import os
+import sys
 import time
+
+def parse_args():
+    """Read the command line options."""
+    parser = argparse.ArgumentParser(description="Falling Pickaxe")
+    parser.add_argument("--headless", action="store_true", help="Run the simulation without a window, audio or frame pacing")
+    parser.add_argument("--frames", type=int, default=None, help="Stop after this many frames")
+    parser.add_argument("--seconds", type=float, default=None, help="Stop after this many seconds of game time")
+    parser.add_argument("--new-run", action="store_true", help="Ignore the last checkpoint and start from the surface")
+    parser.add_argument("--output", metavar="PIPE", default=None,
+                        help="Write the frames as raw bgr0 pixels to this named pipe ('-' for stdout) instead of showing a window")
+    parser.add_argument("--profile", metavar="CSV", default=None, help="Write the frame time profile of the last frames to this file at the end")
+    args = parser.parse_args()
+
+    if args.headless and args.frames is None and args.seconds is None:
+        parser.error("--headless needs --frames or --seconds")
+    if args.headless and args.output is not None:
+        parser.error("--headless does not draw frames, so it cannot be used with --output")
+    return args
+
+# Parsed before the other imports: loading the config and the YouTube stream already prints
+if __name__ == "__main__":
+    args = parse_args()
+    if args.output == "-":
+        sys.stdout = sys.stderr  # Frames go to stdout, so everything printed from here on (also while loading) goes to stderr
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")  # The greeting would end up in frames written to stdout
 import pygame
 import pymunk
 import pymunk.pygame_util
 from youtube import get_live_stream, get_new_live_chat_messages, get_live_chat_id, get_subscriber_count, validate_live_stream_id
 from config import config
-from atlas import create_texture_atlas
+from atlas import create_texture_atlas, scale_texture_atlas
 from pathlib import Path
-from chunk import get_block, clean_chunks, delete_block, chunks
-from constants import BLOCK_SCALE_FACTOR, BLOCK_SIZE, CHUNK_HEIGHT, CHUNK_WIDTH, INTERNAL_HEIGHT, INTERNAL_WIDTH, FRAMERATE
+from chunk import get_chunk, clean_chunks, evict_chunks, delete_block, chunks, prefetch_chunks, attach_ready_chunks, restore_chunk
+from checkpoint import CheckpointWriter, load_checkpoint, snapshot
+from constants import BLOCK_SCALE_FACTOR, BLOCK_SIZE, BLOCK_TEXTURE_SIZE, CHUNK_HEIGHT, INTERNAL_HEIGHT, INTERNAL_WIDTH, FRAMERATE, PHYSICS_STEP_MS, MAX_PHYSICS_STEPS, FAST_SLOW_RATES, CHUNK_PREFETCH_ROWS, CHUNK_ATTACH_BUDGET_MS, CHUNK_EVICT_BUDGET_MS
 from pickaxe import Pickaxe
 from camera import Camera
 from sound import SoundManager
+import gametime
+from gametime import FixedStep
 from tnt import Tnt, MegaTnt
+from walls import Walls
+from explosion import ParticleSystem
+from physics import interpolated, registry, remember_positions
+import collisions
+from render import DirtyRects, present
+from profiler import Profiler
+from frame_output import FrameOutput
+from block import destroy_blocks, update_blocks
 import asyncio
 import threading
 import random
@@ -162,33 +202,62 @@ asyncio_loop = asyncio.new_event_loop()
 # Start it in a daemon thread so it doesn’t block shutdown
 threading.Thread(target=start_event_loop, args=(asyncio_loop,), daemon=True).start()
 
-def game():
+def game(headless=False, max_frames=None, max_seconds=None, resume=True, profile_path=None, output=None):
+    """
+    Run the game loop.
+
+    :param headless: Run the simulation without a window, audio or frame pacing.
+                     Every frame counts as 1/FRAMERATE seconds, so the loop runs as fast as the CPU allows.
+                     Headless runs never load or write checkpoints, and never write to the progress log.
+    :param max_frames: Stop after this many frames (None runs until quit).
+    :param max_seconds: Stop after this many seconds of game time (None runs until quit).
+    :param resume: Continue from the last checkpoint if there is one.
+    :param profile_path: Write the frame time profile of the last frames to this CSV file at the end.
+    :param output: Write the frames as raw pixels to this pipe ("-" for stdout) instead of showing a window.
+    :return: Dict summarizing the run.
+    """
     window_width = int(INTERNAL_WIDTH / 2)
     window_height = int(INTERNAL_HEIGHT / 2)
+    frame_ms = 1000 / FRAMERATE
 
     # Initialize pygame
-    pygame.init()
+    if output is not None:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"  # Everything works as with a window, but nothing is shown
+    if headless:
+        pygame.font.init()  # Fonts are still needed by the HUD and TNT labels
+    else:
+        pygame.init()
     clock = pygame.time.Clock()
 
+    # The game clock is the simulation time, advanced by each physics step
+    gametime.use_simulated_time()
+    # Chat, saving and checkpoints keep real-world intervals, whatever the simulation speed
+    # (headless runs have no real-world side, so they use the simulation time for everything)
+    wall_clock = gametime.get_ticks if headless else pygame.time.get_ticks
+    fixed_step = FixedStep(PHYSICS_STEP_MS, MAX_PHYSICS_STEPS)
+    alpha = 1  # Where the frame is drawn between the last two physics steps
+
     # Pymunk physics
     space = pymunk.Space()
     space.gravity = (0, 1000)  # (x, y) - down is positive y
-
-    # Create a resizable window
-    screen_size = (window_width, window_height)
-    screen = pygame.display.set_mode(screen_size, pygame.RESIZABLE)
-    scaled_surface = pygame.Surface(screen_size).convert()
-    pygame.display.set_caption("Falling Pickaxe")
-    # set icon
-    icon = pygame.image.load(Path(__file__).parent.parent / "src/assets/pickaxe" / "diamond_pickaxe.png")
-    pygame.display.set_icon(icon)
+    collisions.setup(space)
+
+    if not headless:
+        # Create a resizable window
+        screen_size = (window_width, window_height)
+        screen = pygame.display.set_mode(screen_size, pygame.RESIZABLE)
+        scaled_surface = pygame.Surface(screen_size).convert()
+        pygame.display.set_caption("Falling Pickaxe")
+        # set icon
+        icon = pygame.image.load(Path(__file__).parent.parent / "src/assets/pickaxe" / "diamond_pickaxe.png")
+        pygame.display.set_icon(icon)
 
     # Create an internal surface with fixed resolution
     internal_surface = pygame.Surface((INTERNAL_WIDTH, INTERNAL_HEIGHT))
 
     # Load texture atlas
     assets_dir = Path(__file__).parent.parent / "src/assets"
-    (texture_atlas, atlas_items) = create_texture_atlas(assets_dir)
+    (base_atlas, base_atlas_items) = create_texture_atlas(assets_dir)
 
     # Load background
     background_image = pygame.image.load(assets_dir / "background.png")
@@ -196,19 +265,13 @@ def game():
     background_width = int(background_image.get_width() * background_scale_factor)
     background_height = int(background_image.get_height() * background_scale_factor)
     background_image = pygame.transform.scale(background_image, (background_width, background_height))
+    background_position = ((INTERNAL_WIDTH - background_width) // 2, (INTERNAL_HEIGHT - background_height) // 2)
 
     # Scale the entire texture atlas
-    texture_atlas = pygame.transform.scale(texture_atlas,
-                                        (texture_atlas.get_width() * BLOCK_SCALE_FACTOR,
-                                        texture_atlas.get_height() * BLOCK_SCALE_FACTOR))
-
-    for category in atlas_items:
-        for item in atlas_items[category]:
-            x, y, w, h = atlas_items[category][item]
-            atlas_items[category][item] = (x * BLOCK_SCALE_FACTOR, y * BLOCK_SCALE_FACTOR, w * BLOCK_SCALE_FACTOR, h * BLOCK_SCALE_FACTOR)
+    (texture_atlas, atlas_items) = scale_texture_atlas(base_atlas, base_atlas_items, BLOCK_SCALE_FACTOR)
 
     #sounds
-    sound_manager = SoundManager()
+    sound_manager = SoundManager(enabled=not headless)
 
     sound_manager.load_sound("tnt", assets_dir / "sounds" / "tnt.mp3", 0.3)
     sound_manager.load_sound("stone1", assets_dir / "sounds" / "stone1.wav", 0.5)
@@ -223,17 +286,20 @@ def game():
     # Pickaxe
     pickaxe = Pickaxe(space, INTERNAL_WIDTH // 2, INTERNAL_HEIGHT // 2, texture_atlas.subsurface(atlas_items["pickaxe"]["wooden_pickaxe"]), sound_manager)
 
+    # Bedrock side walls
+    walls = Walls(space, texture_atlas, atlas_items)
+
     # TNT
-    last_tnt_spawn = pygame.time.get_ticks()
+    last_tnt_spawn = gametime.get_ticks()
     tnt_spawn_interval = 1000 * random.uniform(config["TNT_SPAWN_INTERVAL_SECONDS_MIN"], config["TNT_SPAWN_INTERVAL_SECONDS_MAX"])
     tnt_list = []  # List to keep track of spawned TNT objects
 
     # Random Pickaxe
-    last_random_pickaxe = pygame.time.get_ticks()
+    last_random_pickaxe = gametime.get_ticks()
     random_pickaxe_interval = 1000 * random.uniform(config["RANDOM_PICKAXE_INTERVAL_SECONDS_MIN"], config["RANDOM_PICKAXE_INTERVAL_SECONDS_MAX"])
 
     # Pickaxe enlargement
-    last_enlarge = pygame.time.get_ticks()
+    last_enlarge = gametime.get_ticks()
     enlarge_interval = 1000 * random.uniform(config["PICKAXE_ENLARGE_INTERVAL_SECONDS_MIN"], config["PICKAXE_ENLARGE_INTERVAL_SECONDS_MAX"])
     enlarge_duration = 1000 * config["PICKAXE_ENLARGE_DURATION_SECONDS"]
 
@@ -241,7 +307,7 @@ def game():
     fast_slow_active = False
     fast_slow = random.choice(["Fast", "Slow"])
     fast_slow_interval = 1000 * random.uniform(config["FAST_SLOW_INTERVAL_SECONDS_MIN"], config["FAST_SLOW_INTERVAL_SECONDS_MAX"])
-    last_fast_slow = pygame.time.get_ticks()
+    last_fast_slow = gametime.get_ticks()
 
     # Camera
     camera = Camera()
@@ -249,27 +315,168 @@ def game():
     # HUD
     hud = Hud(texture_atlas, atlas_items)
 
-    # Explosions
-    explosions = []
+    # Explosion particles (the rotated animation frames are built here, before the first explosion)
+    explosions = ParticleSystem(texture_atlas, atlas_items)
 
     # Youtube
     yt_poll_interval = 1000 * config["YT_POLL_INTERVAL_SECONDS"]
-    last_yt_poll = pygame.time.get_ticks()
+    last_yt_poll = wall_clock()
 
     # Save progress interval
     save_progress_interval = 1000 * config["SAVE_PROGRESS_INTERVAL_SECONDS"]
-    last_save_progress = pygame.time.get_ticks()
+    last_save_progress = wall_clock()
 
     # Youtupe chat queues
     queues_pop_interval = 1000 * config["QUEUES_POP_INTERVAL_SECONDS"]
-    last_queues_pop = pygame.time.get_ticks()
+    last_queues_pop = wall_clock()
+
+    # Checkpoints (headless runs skip them so they never overwrite a stream's progress)
+    checkpoint_path = str(Path(__file__).parent.parent / "logs" / "checkpoint.bin")
+    checkpoint_writer = CheckpointWriter(checkpoint_path) if not headless else None
+    checkpoint_interval = 1000 * config.get("CHECKPOINT_INTERVAL_SECONDS", 5)
+    last_checkpoint = wall_clock()
+
+    def checkpoint_timers(current_time):
+        # Main loop timers, relative to the current time
+        return {
+            "tnt_spawn_elapsed": current_time - last_tnt_spawn,
+            "tnt_spawn_interval": tnt_spawn_interval,
+            "random_pickaxe_elapsed": current_time - last_random_pickaxe,
+            "random_pickaxe_interval": random_pickaxe_interval,
+            "enlarge_elapsed": current_time - last_enlarge,
+            "enlarge_interval": enlarge_interval,
+            "fast_slow_elapsed": current_time - last_fast_slow,
+            "fast_slow_interval": fast_slow_interval,
+            "fast_slow_active": fast_slow_active,
+            "fast_slow": fast_slow,
+        }
+
+    checkpoint = load_checkpoint(checkpoint_path) if checkpoint_writer is not None and resume else None
+    if checkpoint is not None:
+        print("Resuming from checkpoint...")
+        meta, chunk_records = checkpoint
+        current_time = gametime.get_ticks()
+
+        for chunk_x, chunk_y, types, hp, healing in chunk_records:
+            restore_chunk(chunk_x, chunk_y, types, hp, healing, space, current_time)
+
+        state = meta["pickaxe"]
+        pickaxe.pickaxe(state["name"], texture_atlas, atlas_items)
+        pickaxe.body.position = state["position"]
+        pickaxe.body.velocity = state["velocity"]
+        pickaxe.body.angle = state["angle"]
+        pickaxe.body.angular_velocity = state["angular_velocity"]
+        if state["enlarged_ms"] > 0:
+            pickaxe.enlarge(state["enlarged_ms"])
+
+        hud.amounts.update(meta["amounts"])
+
+        for state in meta["tnt"]:
+            tnt_class = MegaTnt if state["name"] == "mega_tnt" else Tnt
+            tnt = tnt_class(space, *state["position"], texture_atlas, atlas_items, sound_manager, owner_name=state["owner"])
+            tnt.body.velocity = state["velocity"]
+            tnt.body.angle = state["angle"]
+            tnt.body.angular_velocity = state["angular_velocity"]
+            tnt.spawn_time = current_time - state["age_ms"]
+            tnt_list.append(tnt)
+
+        timers = meta["timers"]
+        last_tnt_spawn = current_time - timers["tnt_spawn_elapsed"]
+        tnt_spawn_interval = timers["tnt_spawn_interval"]
+        last_random_pickaxe = current_time - timers["random_pickaxe_elapsed"]
+        random_pickaxe_interval = timers["random_pickaxe_interval"]
+        last_enlarge = current_time - timers["enlarge_elapsed"]
+        enlarge_interval = timers["enlarge_interval"]
+        last_fast_slow = current_time - timers["fast_slow_elapsed"]
+        fast_slow_interval = timers["fast_slow_interval"]
+        fast_slow_active = timers["fast_slow_active"]
+        fast_slow = timers["fast_slow"]
+
+        # Start the camera on the pickaxe instead of panning down from the surface
+        camera.offset_y = pickaxe.body.position.y - INTERNAL_HEIGHT // 2
+
+    # Drawing, split in layers so the dirty rect mode can redraw parts of a frame
+    visible_chunks = []
+    canvas = internal_surface  # Surface the layers are drawn to
+    render_atlas, render_atlas_items = texture_atlas, atlas_items  # Atlas with textures at the drawing size
+    render_background, render_background_position = background_image, background_position
+
+    def draw_world():
+        # Everything that only moves with the camera
+        canvas.blit(render_background, render_background_position)
+        for chunk in visible_chunks:
+            chunk.draw(canvas, camera, render_atlas, render_atlas_items)
+        walls.draw(canvas, camera)
+        profiler.mark("world")
+
+    def draw_sprites():
+        rects = [pickaxe.draw(canvas, camera, alpha)]
+        for tnt in tnt_list:
+            rect = tnt.draw(canvas, camera, alpha)
+            if rect is not None:
+                rects.append(rect)
+        rects.extend(explosions.draw(canvas, camera))
+        profiler.mark("sprites")
+        return rects
+
+    def draw_hud():
+        if render_at_window_size:
+            rect = hud.draw_scaled(canvas, camera.scale, pickaxe.body.position.y, fast_slow_active, fast_slow)
+        else:
+            rect = hud.draw(canvas, pickaxe.body.position.y, fast_slow_active, fast_slow)
+        profiler.mark("hud")
+        return rect
+
+    # Draw straight to the window at its resolution instead of scaling a finished internal frame
+    render_at_window_size = config.get("RENDER_AT_WINDOW_SIZE", False) and not headless and output is None
+
+    def use_window_size():
+        nonlocal canvas, render_atlas, render_atlas_items, render_background, render_background_position
+        # Blocks are whole pixels at any window size, the world scale follows from that
+        cell_size = max(1, round(BLOCK_SIZE * window_width / INTERNAL_WIDTH))
+        camera.scale = cell_size / BLOCK_SIZE
+        render_atlas, render_atlas_items = scale_texture_atlas(base_atlas, base_atlas_items, cell_size / BLOCK_TEXTURE_SIZE)
+        explosions.set_atlas(render_atlas, render_atlas_items)
+        render_background = pygame.transform.scale(background_image, (round(background_width * camera.scale), round(background_height * camera.scale)))
+        render_background_position = (round(background_position[0] * camera.scale), round(background_position[1] * camera.scale))
+        canvas = screen
+
+    if render_at_window_size:
+        use_window_size()
+
+    # Only redraw and present the parts of the screen that changed
+    dirty_rects = DirtyRects(canvas) if config.get("DIRTY_RECT_RENDERING", False) and not headless and output is None else None
+
+    # Hand every frame to an encoder (the whole frame is drawn each time, into alternating surfaces)
+    frame_output = FrameOutput(output) if output is not None else None
+    if frame_output is not None:
+        canvas = frame_output.surface
+
+    # Time spent in each phase of the loop (F3 shows it, F4 saves it to the logs folder)
+    profiler = Profiler()
 
     # Main loop
     running = True
     user_quit = False
+    frames = 0
+    peak_bodies = 0
     while running:
+        if frames > 0:
+            bodies = registry(space).bodies  # Counted as they are added, space.bodies would build a list
+            peak_bodies = max(peak_bodies, bodies)
+            profiler.end_frame(bodies=bodies, shapes=registry(space).shapes, loaded_chunks=len(chunks),
+                               tnt_count=len(tnt_list), particle_count=len(explosions),
+                               sounds_dropped=sum(sound_manager.dropped.values()))
+
+        # Stop headless or benchmark runs once their budget is spent (counts as a clean exit)
+        if (max_frames is not None and frames >= max_frames) or \
+           (max_seconds is not None and gametime.get_ticks() >= max_seconds * 1000):
+            user_quit = True
+            break
+        frames += 1
+
         # ++++++++++++++++++  EVENTS ++++++++++++++++++
-        for event in pygame.event.get():
+        for event in (pygame.event.get() if not headless else []):
             if event.type == pygame.QUIT:  # Close window event
                 running = False
                 user_quit = True
@@ -285,37 +492,68 @@ def game():
                 window_width, window_height = new_width, new_height
                 screen = pygame.display.set_mode((window_width, window_height), pygame.RESIZABLE)
                 scaled_surface = pygame.Surface((window_width, window_height)).convert()
-
+                if render_at_window_size:
+                    screen.fill((0, 0, 0))
+                    use_window_size()
+                    if dirty_rects is not None:
+                        dirty_rects = DirtyRects(canvas)
+                elif dirty_rects is not None:
+                    dirty_rects.invalidate()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                profiler.toggle()
+                if dirty_rects is not None:
+                    dirty_rects.invalidate()  # Remove the overlay
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+                log_dir = Path(__file__).parent.parent / "logs"
+                log_dir.mkdir(parents=True, exist_ok=True)
+                profiler.export_csv(log_dir / f"profile-{time.strftime('%Y%m%d-%H%M%S')}.csv")
+
+        profiler.mark("events")
         # ++++++++++++++++++  UPDATE ++++++++++++++++++
         # Determine which chunks are visible
         # Update physics
 
-        dt_ms = clock.get_time()
-        current_time = pygame.time.get_ticks()
+        dt_ms = clock.get_time() if not headless else frame_ms
+
+        # Run as many fixed physics steps as the frame took, Fast and Slow change the simulation speed
+        rate = FAST_SLOW_RATES[fast_slow] if fast_slow_active else 1
+        for _ in range(fixed_step.steps(dt_ms, rate)):
+            remember_positions([pickaxe.body] + [tnt.body for tnt in tnt_list])
+            space.step(PHYSICS_STEP_MS / 1000)
+            gametime.advance(PHYSICS_STEP_MS)
+            current_time = gametime.get_ticks()
+            profiler.mark("physics")
+
+            # Remove the blocks broken during this step
+            destroy_blocks(space, hud)
+            profiler.mark("blocks")
+
+            # Update pickaxe
+            pickaxe.update(current_time)
+            profiler.mark("game")
+
+            # Update all TNTs
+            for tnt in tnt_list:
+                tnt.update(tnt_list, explosions, camera, current_time)
+            profiler.mark("tnt")
 
-        step_speed = 1 / FRAMERATE  # Fixed time step for physics simulation
-        if fast_slow_active and fast_slow == "Fast":
-            step_speed = 1 / (FRAMERATE / 2)
-        elif fast_slow_active and fast_slow == "Slow":
-            step_speed = 1 / (FRAMERATE * 2)
+            # Heal damaged blocks
+            update_blocks(current_time)
+            profiler.mark("blocks")
 
-        space.step(step_speed)
+        current_time = gametime.get_ticks()
+        real_time = wall_clock()
+        alpha = fixed_step.alpha
+        (_, pickaxe_y), _ = interpolated(pickaxe.body, alpha)
 
         start_chunk_y = int(pickaxe.body.position.y // (CHUNK_HEIGHT * BLOCK_SIZE) - 1) - 1
         end_chunk_y = int(pickaxe.body.position.y + INTERNAL_HEIGHT) // (CHUNK_HEIGHT * BLOCK_SIZE)  + 1
 
-        # Update pickaxe
-        pickaxe.update(current_time)
-
         # Update camera
-        camera.update(pickaxe.body.position.y)
-
-        # ++++++++++++++++++  DRAWING ++++++++++++++++++
-        # Clear the internal surface
-        screen.fill((0, 0, 0))
+        camera.update(pickaxe_y)
 
-        # Fill internal surface with the background
-        internal_surface.blit(background_image, ((INTERNAL_WIDTH - background_width) // 2, (INTERNAL_HEIGHT - background_height) // 2))
+        # Keep the side walls around the visible area
+        walls.update(camera.offset_y + INTERNAL_HEIGHT // 2)
 
         # Check if it's time to spawn a new TNT (regular random spawn)
         if (not config["CHAT_CONTROL"] or (not tnt_queue and not tnt_superchat_queue and not mega_tnt_queue)) and current_time - last_tnt_spawn >= tnt_spawn_interval:
@@ -354,19 +592,15 @@ def game():
             fast_slow_active = False
             last_fast_slow = current_time
 
-        # Update all TNTs
-        for tnt in tnt_list:
-            tnt.update(tnt_list, explosions, camera, current_time)
-
         # Poll Yotutube api
-        if live_chat_id is not None and current_time - last_yt_poll >= yt_poll_interval:
+        if live_chat_id is not None and real_time - last_yt_poll >= yt_poll_interval:
             print("Polling YouTube API...")
-            last_yt_poll = current_time
+            last_yt_poll = real_time
             asyncio.run_coroutine_threadsafe(handle_youtube_poll(), asyncio_loop)
 
         # Process chat queues
-        if config["CHAT_CONTROL"] and current_time - last_queues_pop >= queues_pop_interval:
-            last_queues_pop = current_time
+        if config["CHAT_CONTROL"] and real_time - last_queues_pop >= queues_pop_interval:
+            last_queues_pop = real_time
 
             # Handle regular TNT from chat command
             if tnt_queue:
@@ -426,49 +660,65 @@ def game():
                 random_pickaxe_interval = 1000 * random.uniform(config["RANDOM_PICKAXE_INTERVAL_SECONDS_MIN"], config["RANDOM_PICKAXE_INTERVAL_SECONDS_MAX"])
 
 
-        # Delete chunks
-        clean_chunks(start_chunk_y, space)
-
-        # Draw blocks in visible chunks
-        for chunk_x in range(-1, 2):
-            for chunk_y in range(start_chunk_y, end_chunk_y):
-                for y in range(CHUNK_HEIGHT):
-                    for x in range(CHUNK_WIDTH):
-                        block = get_block(chunk_x, chunk_y, x, y, texture_atlas, atlas_items, space)
-
-                        if block == None:
-                            continue
-
-                        block.update(space, hud, current_time)
-                        block.draw(internal_surface, camera)
+        profiler.mark("game")
 
-        # Draw pickaxe
-        pickaxe.draw(internal_surface, camera)
+        # Delete chunks
+        clean_chunks(start_chunk_y)
+        evict_chunks(space, CHUNK_EVICT_BUDGET_MS)
 
-        # Draw TNT
-        for tnt in tnt_list:
-            tnt.draw(internal_surface, camera)
+        # Generate the rows below the screen ahead of time and add finished ones to the space
+        prefetch_chunks(end_chunk_y, end_chunk_y + CHUNK_PREFETCH_ROWS)
+        attach_ready_chunks(space, CHUNK_ATTACH_BUDGET_MS)
 
-        # Draw particles
-        for explosion in explosions:
-            explosion.update(dt_ms)
-            explosion.draw(internal_surface, camera)
+        # Load the visible chunks
+        visible_chunks = []
+        for chunk_y in range(start_chunk_y, end_chunk_y):
+            chunk = get_chunk(0, chunk_y, space)
 
-        # Optionally, remove explosions that have no particles left:
-        explosions = [e for e in explosions if e.particles]
+            if chunk is not None:
+                visible_chunks.append(chunk)
 
-        # Draw HUD
-        hud.draw(internal_surface, pickaxe.body.position.y, fast_slow_active, fast_slow)
+        profiler.mark("chunks")
 
-        # Scale internal surface to fit the resized window
-        pygame.transform.scale(internal_surface, (window_width, window_height), scaled_surface)
-        screen.blit(scaled_surface, (0, 0))
+        # Update particles
+        explosions.update(dt_ms)
+        profiler.mark("particles")
 
-        # Save progress
-        if current_time - last_save_progress >= save_progress_interval:
+        # ++++++++++++++++++  DRAWING ++++++++++++++++++
+        if not headless:
+            if dirty_rects is None:
+                draw_world()
+                draw_sprites()
+                draw_hud()
+                changed_rects = None
+            else:
+                changed_cells = [rect for chunk in visible_chunks for rect in chunk.refresh(render_atlas, render_atlas_items, camera)]
+                hud_state = hud.state(pickaxe.body.position.y, fast_slow_active, fast_slow)
+                changed_rects = dirty_rects.draw(camera, changed_cells, hud_state, draw_world, draw_sprites, draw_hud)
+
+            if frame_output is not None:
+                frame_output.submit()  # Dropped if the encoder is still reading the last frame
+                canvas = frame_output.surface
+            elif render_at_window_size:
+                updated_rects = changed_rects  # Already drawn to the window
+            elif changed_rects is None:
+                # Scale internal surface to fit the resized window
+                screen.fill((0, 0, 0))
+                pygame.transform.scale(internal_surface, (window_width, window_height), scaled_surface)
+                screen.blit(scaled_surface, (0, 0))
+            else:
+                updated_rects = present(screen, internal_surface, changed_rects)
+
+            overlay_rect = profiler.draw(screen)
+            if overlay_rect is not None and changed_rects is not None:
+                updated_rects.append(overlay_rect)
+            profiler.mark("present")
+
+        # Save progress (headless runs skip it so they never add to a stream's log)
+        if not headless and real_time - last_save_progress >= save_progress_interval:
             # Save the game state or progress here
             print("Saving progress...")
-            last_save_progress = current_time
+            last_save_progress = real_time
             # Save progress to logs folder
             log_dir = Path(__file__).parent.parent / "logs"
             log_dir.mkdir(parents=True, exist_ok=True)
@@ -484,9 +734,24 @@ def game():
                 f.write(f"diamond: {hud.amounts['diamond']} ")
                 f.write(f"emerald: {hud.amounts['emerald']} \n")
 
-        # Update the display
-        pygame.display.flip()
+        # Write a checkpoint to resume from after a crash
+        if checkpoint_writer is not None and real_time - last_checkpoint >= checkpoint_interval:
+            last_checkpoint = real_time
+            checkpoint_writer.save(*snapshot(chunks, pickaxe, hud, tnt_list, checkpoint_timers(current_time), current_time))
+
+        profiler.mark("game")
+
+        if headless:
+            continue  # No waiting, the next frame starts right away
+
+        # Update the display (frames written to an output have no window to show them in)
+        if frame_output is None and changed_rects is None:
+            pygame.display.flip()
+        elif frame_output is None:
+            pygame.display.update(updated_rects)
+        profiler.mark("flip")
         clock.tick(FRAMERATE)  # Cap the frame rate
+        profiler.mark("wait")
 
         # Inside the main loop
         keys = pygame.key.get_pressed()
@@ -517,15 +782,41 @@ def game():
         else:
             key_m_pressed = False  # Reset the flag when the key is released
 
+    # Keep the final state for the next start
+    if checkpoint_writer is not None:
+        current_time = gametime.get_ticks()
+        checkpoint_writer.wait()
+        checkpoint_writer.save(*snapshot(chunks, pickaxe, hud, tnt_list, checkpoint_timers(current_time), current_time))
+        checkpoint_writer.wait()
+
+    if profile_path is not None:
+        profiler.export_csv(profile_path)
+
+    if frame_output is not None:
+        frame_output.close()
+
     # Quit pygame properly
     pygame.quit()
 
+    return {
+        "user_quit": user_quit,
+        "frames": frames,
+        "seconds": gametime.get_ticks() / 1000,
+        "depth": -int(pickaxe.body.position.y // BLOCK_SIZE),
+        "amounts": dict(hud.amounts),
+        "peak_bodies": peak_bodies,
+        "frame_ms": profiler.stats()["frame"],  # Percentiles over the last frames
+    }
+
+if __name__ == "__main__":
+    result = game(headless=args.headless, max_frames=args.frames, max_seconds=args.seconds, resume=not args.new_run, profile_path=args.profile, output=args.output)
+
+    if args.headless:
+        print(f"Simulated {result['frames']} frames ({result['seconds']:.1f}s) | Y: {result['depth']} | {result['amounts']}")
+        sys.exit(0)
+
     # Return exit code: 0 for user quit (close window), 1 for crash/error
-    if user_quit:
-        import sys
+    if result["user_quit"]:
         sys.exit(0)  # Normal exit - user closed window
     else:
-        import sys
         sys.exit(1)  # Abnormal exit - game crashed or error
-
-game()
@@ -0,0 +1,74 @@
+import pymunk
+
+class PhysicsRegistry:
+    """
+    Keeps track of the bodies and shapes added to a space.
+
+    pymunk's `space.bodies` and `space.shapes` build a new list on every access, so checking
+    membership through them costs time proportional to the size of the world. The registry
+    answers the same question from a set, and adds or removes a batch of objects in one call.
+    It also counts the attached bodies and shapes, for the same reason.
+    """
+
+    def __init__(self, space):
+        self.space = space
+        self._attached = set()
+        self.bodies = 0
+        self.shapes = 0
+
+    def __contains__(self, obj):
+        return obj in self._attached
+
+    def __len__(self):
+        return len(self._attached)
+
+    def add(self, *objects):
+        """Add the objects that are not in the space yet."""
+        added = [obj for obj in objects if obj is not None and obj not in self._attached]
+        if added:
+            self._attached.update(added)
+            self.space.add(*added)
+            self._count(added, 1)
+
+    def remove(self, *objects):
+        """Remove the objects that are in the space, ignoring the others."""
+        removed = [obj for obj in objects if obj in self._attached]
+        if removed:
+            self._attached.difference_update(removed)
+            self.space.remove(*removed)
+            self._count(removed, -1)
+
+    def _count(self, objects, sign):
+        bodies = sum(1 for obj in objects if isinstance(obj, pymunk.Body))
+        self.bodies += sign * bodies
+        self.shapes += sign * (len(objects) - bodies)
+
+def registry(space):
+    """Get the registry of a space, creating it on first use."""
+    space_registry = getattr(space, "registry", None)
+    if space_registry is None:
+        space_registry = PhysicsRegistry(space)
+        space.registry = space_registry
+    return space_registry
+
+def remember_positions(bodies):
+    """Store where the bodies are before a step, for `interpolated`."""
+    for body in bodies:
+        body.previous_state = (body.position, body.angle)
+
+def interpolated(body, alpha):
+    """
+    Position and angle of `body` a share `alpha` of the way from before its last step to now.
+
+    Drawing at these instead of the stepped positions keeps the motion smooth when frames
+    and physics steps do not line up.
+
+    :return: ((x, y), angle)
+    """
+    previous = getattr(body, "previous_state", None)
+    if previous is None:
+        return body.position, body.angle
+    (previous_x, previous_y), previous_angle = previous
+    x, y = body.position
+    return ((previous_x + (x - previous_x) * alpha, previous_y + (y - previous_y) * alpha),
+            previous_angle + (body.angle - previous_angle) * alpha)
@@ -1,9 +1,12 @@
 import pygame
+import gametime
 import math
 import pymunk
-import pymunk.autogeometry
 from chunk import chunks
-from constants import BLOCK_SIZE, CHUNK_WIDTH
+from collisions import PICKAXE
+from constants import BLOCK_SIZE
+from physics import interpolated, registry
+from sprites import rotated
 import random
 
 def rotate_point(x, y, angle):
@@ -34,6 +37,7 @@ class Pickaxe:
         self.space = space
         self.damage = damage
         self.is_enlarged = False
+        self.name = "wooden_pickaxe"
 
         vertices = rotate_vertices([
                     (0, 0), # A
@@ -74,26 +78,34 @@ class Pickaxe:
             shape = pymunk.Poly(self.body, vertices)
             shape.elasticity = 0.7
             shape.friction = 0.7
-            shape.collision_type = 1  # Identifier for collisions
+            shape.collision_type = PICKAXE
+            shape.entity_ref = self  # Collisions are passed on to the pickaxe through this
             self.shapes.append(shape)
 
-        self.space.add(self.body, *self.shapes)
+        registry(self.space).add(self.body, *self.shapes)
 
-        # Add collision handler for pickaxe & blocks
-        handler = space.add_collision_handler(1, 2)  # (Pickaxe type, Block type)
-        handler.post_solve = self.on_collision
+    def hit(self, block_shape, arbiter):
+        """Handles a hit on a block shape (see collisions): Reduce HP or destroy the block."""
+        chunk = block_shape.chunk_ref
 
-    def on_collision(self, arbiter, space, data):
-        """Handles collision with blocks: Reduce HP or destroy the block."""
-        block_shape = arbiter.shapes[1]  # Get the block shape
-        block = block_shape.block_ref  # Get the actual block instance
+        # Block shapes cover several cells, so find the cells under the contact points
+        hit_cells = {chunk.hit_cell(block_shape, contact.point_b) for contact in arbiter.contact_point_set.points}
+        if not hit_cells:
+            return
+
+        current_time = gametime.get_ticks()
+        for index in hit_cells:
+            block = chunk.block(index)  # Get the damage state of the hit cell
+            block.hit(self.damage, current_time)  # Reduce HP when hit
 
-        block.first_hit_time = pygame.time.get_ticks()  
-        block.last_heal_time = block.first_hit_time
+        self._hit_effects(block.name)
 
-        block.hp -= self.damage  # Reduce HP when hit
+    def hit_wall(self, arbiter):
+        """Handles a hit on a bedrock wall (see collisions): Sound and nudge, walls take no damage."""
+        self._hit_effects("bedrock")
 
-        if (block.name == "grass_block" or block.name == "dirt"):
+    def _hit_effects(self, block_name):
+        if (block_name == "grass_block" or block_name == "dirt"):
             self.sound_manager.play_sound("grass" + str(random.randint(1, 4)))
         else:
             self.sound_manager.play_sound("stone" + str(random.randint(1, 4)))
@@ -105,11 +117,13 @@ class Pickaxe:
         """Randomly change the pickaxe's properties."""
 
         pickaxe_name = random.choice(list(atlas_items["pickaxe"].keys()))
+        self.name = pickaxe_name
         self.texture = texture_atlas.subsurface(atlas_items["pickaxe"][pickaxe_name])
         print("Setting pickaxe to:", pickaxe_name)
 
         if self.is_enlarged:
-            # Scale up texture
+            # Scale up texture, and return to the new pickaxe when the enlargement ends
+            self.original_texture = self.texture
             new_size = (BLOCK_SIZE * 3, BLOCK_SIZE * 3)
             self.texture = pygame.transform.scale(self.texture, new_size)
 
@@ -129,11 +143,13 @@ class Pickaxe:
     def pickaxe(self, name, texture_atlas, atlas_items):
         """Set the pickaxe's properties based on its name."""
 
+        self.name = name
         self.texture = texture_atlas.subsurface(atlas_items["pickaxe"][name])
         print("Setting pickaxe to:", name)
 
         if self.is_enlarged:
-            # Scale up texture
+            # Scale up texture, and return to the new pickaxe when the enlargement ends
+            self.original_texture = self.texture
             new_size = (BLOCK_SIZE * 3, BLOCK_SIZE * 3)
             self.texture = pygame.transform.scale(self.texture, new_size)
 
@@ -153,48 +169,28 @@ class Pickaxe:
     def update(self, current_time=None):
         """Apply gravity, update movement, check collisions, and rotate."""
         if current_time is None:
-            current_time = pygame.time.get_ticks()
+            current_time = gametime.get_ticks()
         # Manually limit the falling speed (terminal velocity)
         if self.body.velocity.y > 1000:
             self.body.velocity = (self.body.velocity.x, 1000)
 
-        # --- Bounding box check for bedrock collision ---
-        # Gather all vertices from all shapes, transformed to world coordinates
-        all_vertices = []
-        for shape in self.shapes:
-            for v in shape.get_vertices():
-                # Transform local vertex to world coordinates
-                world_v = self.body.local_to_world(v)
-                all_vertices.append(world_v)
-
-        min_x = min(v.x for v in all_vertices)
-        max_x = max(v.x for v in all_vertices)
-
-        left_limit = BLOCK_SIZE
-        right_limit = BLOCK_SIZE * (CHUNK_WIDTH - 1)
-
-        # If any part is left of the left limit, shift the body right
-        if min_x < left_limit:
-            dx = left_limit - min_x
-            self.body.position = (self.body.position.x + dx, self.body.position.y)
-
-        # If any part is right of the right limit, shift the body left
-        if max_x > right_limit:
-            dx = max_x - right_limit
-            self.body.position = (self.body.position.x - dx, self.body.position.y)
-
         # If pickaxe is enlarged, check if time is up
         if hasattr(self, "enlarge_end_time") and current_time > self.enlarge_end_time:
             self.reset_size()
             self.is_enlarged = False
 
-    def draw(self, screen, camera):
-        """Draw the pickaxe at its current position."""
-        rotated_image = pygame.transform.rotate(self.texture, -math.degrees(self.body.angle))  # Convert to degrees
-        rect = rotated_image.get_rect(center=(self.body.position.x, self.body.position.y))
-        rect.y -= camera.offset_y
-        rect.x -= camera.offset_x
+    def draw(self, screen, camera, alpha=1):
+        """
+        Draw the pickaxe and return the rect it covers.
+
+        :param alpha: Where to draw it between its last two physics steps, see `interpolated`.
+        """
+        (x, y), angle = interpolated(self.body, alpha)
+        # Cached by name and size: the texture surface is recreated whenever the pickaxe changes
+        rotated_image = rotated(self.texture, -math.degrees(angle), camera.scale, (self.name, self.is_enlarged))  # Convert to degrees
+        rect = rotated_image.get_rect(center=((x - camera.offset_x) * camera.scale, (y - camera.offset_y) * camera.scale))
         screen.blit(rotated_image, rect)
+        return rect
 
     def enlarge(self, duration=5000):
         """Temporarily makes the pickaxe 3 times bigger with a larger hitbox."""
@@ -206,7 +202,7 @@ class Pickaxe:
             return
 
         # Not enlarged yet, so store original texture and shapes
-        self.original_texture = self.texture.copy()
+        self.original_texture = self.texture
         self.original_shapes = self.shapes[:]  # Store original hitbox shapes
         self.is_enlarged = True
 
@@ -215,7 +211,7 @@ class Pickaxe:
         self.texture = pygame.transform.scale(self.original_texture, new_size)
 
         # Scale up hitbox:
-        self.space.remove(*self.shapes)  # Remove current shapes
+        registry(self.space).remove(*self.shapes)  # Remove current shapes
         new_shapes = []
         for shape in self.original_shapes:
             # Get vertices from original shape and scale them by 3.
@@ -224,23 +220,24 @@ class Pickaxe:
             new_shape.elasticity = shape.elasticity
             new_shape.friction = shape.friction
             new_shape.collision_type = shape.collision_type
+            new_shape.entity_ref = self
             new_shapes.append(new_shape)
         self.shapes = new_shapes
-        self.space.add(*self.shapes)  # Add new enlarged shapes
+        registry(self.space).add(*self.shapes)  # Add new enlarged shapes
 
         # Track when the enlargement effect should end
-        self.enlarge_end_time = pygame.time.get_ticks() + duration
+        self.enlarge_end_time = gametime.get_ticks() + duration
 
     def reset_size(self):
         """Restore the pickaxe to its original size."""
         if hasattr(self, "original_shapes"):
             # Restore texture using the stored original.
-            self.texture = self.original_texture.copy()
+            self.texture = self.original_texture
 
             # Reset hitbox: remove enlarged shapes and add back the original shapes.
-            self.space.remove(*self.shapes)
+            registry(self.space).remove(*self.shapes)
             self.shapes = self.original_shapes[:]
-            self.space.add(*self.shapes)
+            registry(self.space).add(*self.shapes)
             self.is_enlarged = False
 
             del self.enlarge_end_time  # Remove the enlargement timer
@@ -0,0 +1,122 @@
+import csv
+import math
+import time
+import pygame
+from collections import deque
+
+WINDOW_FRAMES = 600  # Frames the percentiles are taken over (10 seconds at 60 FPS)
+OVERLAY_REFRESH_MS = 500  # How often the overlay text is rendered again
+PERCENTILES = (50, 95, 99)
+
+# Main loop phases, in the order they run
+PHASES = ("events", "physics", "blocks", "game", "tnt", "chunks", "particles",
+          "world", "sprites", "hud", "present", "flip", "wait")
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+class Profiler:
+    """
+    Frame times of each main loop phase and a few counters, over the last WINDOW_FRAMES frames.
+
+    The loop calls `mark(phase)` after each phase: the time since the previous mark is added
+    to that phase, so a phase that runs in several places of the loop is summed per frame.
+    """
+
+    def __init__(self, phases=PHASES, window=WINDOW_FRAMES, clock=time.perf_counter):
+        self.phases = phases
+        self.clock = clock
+        self.frames = deque(maxlen=window)  # (phase times in ms, counters) per finished frame
+        self.frame_count = 0
+        self.visible = False
+        self.font = None
+        self.overlay = None
+        self.overlay_time = None
+        self._times = dict.fromkeys(phases, 0.0)
+        self._last = clock()
+
+    def mark(self, phase):
+        """Add the time since the previous mark to `phase`."""
+        now = self.clock()
+        self._times[phase] += (now - self._last) * 1000
+        self._last = now
+
+    def end_frame(self, **counters):
+        """Finish the current frame and store its times with `counters` (e.g. bodies=..., tnt=...)."""
+        self.mark(self.phases[-1])  # Anything after the last mark
+        self.frames.append((self._times, counters))
+        self.frame_count += 1
+        self._times = dict.fromkeys(self.phases, 0.0)
+
+    def stats(self):
+        """
+        Percentiles of every phase and of the whole frame over the window.
+
+        :return: Dict of phase (and "frame") to a tuple with one value per PERCENTILES entry, in ms.
+        """
+        columns = {phase: sorted(times[phase] for times, _ in self.frames) for phase in self.phases}
+        columns["frame"] = sorted(sum(times.values()) for times, _ in self.frames)
+        return {name: tuple(percentile(values, p) for p in PERCENTILES) for name, values in columns.items()}
+
+    def counters(self):
+        """Counters of the last finished frame."""
+        return self.frames[-1][1] if self.frames else {}
+
+    def export_csv(self, path):
+        """Write one row per frame in the window: phase times in ms, the frame total and the counters."""
+        counter_names = list(self.counters())
+        first_frame = self.frame_count - len(self.frames)
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", *self.phases, "total", *counter_names])
+            for i, (times, counters) in enumerate(self.frames):
+                row = [round(times[phase], 3) for phase in self.phases]
+                writer.writerow([first_frame + i, *row, round(sum(times.values()), 3),
+                                 *(counters.get(name, "") for name in counter_names)])
+        print(f"Profile of {len(self.frames)} frames written to {path}")
+
+    def toggle(self):
+        self.visible = not self.visible
+        self.overlay = None
+
+    def draw(self, screen, margin=8):
+        """
+        Draw the overlay with the percentiles and counters in the top right corner, if it is visible.
+
+        The text is rendered again every OVERLAY_REFRESH_MS, on an opaque box so it can be
+        drawn over the last frame without clearing it.
+
+        :return: The rect covered by the overlay, or None.
+        """
+        if not self.visible:
+            return None
+
+        now = self.clock() * 1000
+        if self.overlay is None or now - self.overlay_time >= OVERLAY_REFRESH_MS:
+            self.overlay = self._render()
+            self.overlay_time = now
+        return screen.blit(self.overlay, (screen.get_width() - self.overlay.get_width() - margin, margin))
+
+    def _render(self):
+        if self.font is None:
+            self.font = pygame.font.SysFont("monospace", 14)
+
+        header = f"{'phase':<14}" + "".join(f"{f'p{p}':>8}" for p in PERCENTILES)
+        lines = [header]
+        for name, values in self.stats().items():
+            lines.append(f"{name:<14}" + "".join(f"{value:8.2f}" for value in values))
+        lines.extend(f"{name:<14}{value:8}" for name, value in self.counters().items())
+
+        rendered = [self.font.render(line, True, (255, 255, 255)) for line in lines]
+        line_height = self.font.get_linesize()
+        # Never shrink, so a new box always covers the old one
+        width = max([line.get_width() + 8 for line in rendered] + [self.overlay.get_width() if self.overlay else 0])
+        surface = pygame.Surface((width, line_height * len(rendered) + 8))
+        surface.fill((0, 0, 0))
+        for i, line in enumerate(rendered):
+            surface.blit(line, (4, 4 + i * line_height))
+        return surface
@@ -0,0 +1,121 @@
+import math
+import pygame
+
+# Above this share of the surface a full redraw is cheaper than many clipped ones
+FULL_REDRAW_AREA = 0.5
+
+class DirtyRects:
+    """
+    Redraws only the parts of the drawing surface that changed since the last frame.
+
+    While the camera stands still, the static layers (background, chunks, walls) are only
+    redrawn under the moving sprites of the last frame, chunk cells that changed and the HUD
+    when it changed. Once the camera moves every pixel changes, so the whole frame is drawn.
+    """
+
+    def __init__(self, surface):
+        self.surface = surface
+        self.bounds = surface.get_rect()
+        self.hud_rect = pygame.Rect(0, 0, 0, 0)
+        self._camera_position = None
+        self._sprite_rects = []  # Rects covered by the sprites of the last frame
+        self._hud_state = None
+        self._full = True
+
+    def invalidate(self):
+        """Draw the whole next frame, e.g. after the window was resized."""
+        self._full = True
+
+    def draw(self, camera, changed_rects, hud_state, draw_world, draw_sprites, draw_hud):
+        """
+        Draw a frame to the surface.
+
+        :param changed_rects: Rects of the static layers that changed (redrawn chunk cells).
+        :param hud_state: What the HUD shows, see `Hud.state`.
+        :param draw_world: Draws the static layers, honoring the clip rect of the surface.
+        :param draw_sprites: Draws the moving things and returns the rects they cover.
+        :param draw_hud: Draws the HUD and returns its rect.
+        :return: Rects of the surface that changed, or None if the whole surface was drawn.
+        """
+        # Blits truncate positions, so the layers only move when an offset crosses a whole pixel
+        x, y = camera.offset_x * camera.scale, camera.offset_y * camera.scale
+        camera_position = (math.floor(x), math.ceil(x), math.floor(y), math.ceil(y), camera.scale)
+        hud_changed = hud_state != self._hud_state
+        full = self._full or camera_position != self._camera_position
+        self._camera_position = camera_position
+        self._hud_state = hud_state
+        self._full = False
+
+        dirty = [] if full else self._merge(self._sprite_rects + list(changed_rects))
+        if not full and sum(rect.w * rect.h for rect in dirty) > FULL_REDRAW_AREA * self.bounds.w * self.bounds.h:
+            full = True
+
+        if full:
+            draw_world()
+            self._sprite_rects = self._clip(draw_sprites())
+            self.hud_rect = draw_hud()
+            return None
+
+        redraw_hud = hud_changed or self.hud_rect.collidelist(dirty) != -1
+        if redraw_hud:
+            dirty.append(self.hud_rect)
+        self._draw_clipped(dirty, draw_world)
+        sprite_rects = self._clip(draw_sprites())
+
+        # A sprite moved under the HUD: restore that area so the HUD ends up on top again
+        if not redraw_hud and self.hud_rect.collidelist(sprite_rects) != -1:
+            redraw_hud = True
+            dirty.append(self.hud_rect)
+            self._draw_clipped([self.hud_rect], draw_world, draw_sprites)
+
+        if redraw_hud:
+            self.hud_rect = draw_hud()
+            dirty.append(self.hud_rect)
+
+        self._sprite_rects = sprite_rects
+        return dirty + sprite_rects
+
+    def _draw_clipped(self, rects, *draw_functions):
+        for rect in rects:
+            self.surface.set_clip(rect)
+            for draw in draw_functions:
+                draw()
+        self.surface.set_clip(None)
+
+    def _clip(self, rects):
+        return [rect.clip(self.bounds) for rect in rects if rect.colliderect(self.bounds)]
+
+    def _merge(self, rects):
+        # Join overlapping rects, so no area is redrawn twice
+        merged = []
+        for rect in self._clip(rects):
+            rect = rect.copy()
+            index = rect.collidelist(merged)
+            while index != -1:
+                rect.union_ip(merged.pop(index))
+                index = rect.collidelist(merged)
+            merged.append(rect)
+        return merged
+
+def present(screen, surface, rects):
+    """
+    Scale the changed rects of the internal surface onto the window.
+
+    :return: The window rects to pass to `pygame.display.update`.
+    """
+    scale_x = screen.get_width() / surface.get_width()
+    scale_y = screen.get_height() / surface.get_height()
+    bounds = surface.get_rect()
+
+    updated = []
+    for rect in rects:
+        # Grow by a pixel so rounding never leaves a seam at the edges
+        rect = rect.inflate(2, 2).clip(bounds)
+        left, top = math.floor(rect.left * scale_x), math.floor(rect.top * scale_y)
+        right, bottom = math.ceil(rect.right * scale_x), math.ceil(rect.bottom * scale_y)
+        if right <= left or bottom <= top:
+            continue
+        area = pygame.Rect(left, top, right - left, bottom - top)
+        screen.blit(pygame.transform.scale(surface.subsurface(rect), area.size), area)
+        updated.append(area)
+    return updated
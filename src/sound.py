@@ -1,21 +1,80 @@
 import pygame
+from collections import Counter
+
+# Limits per sound group: (voices playing at once, minimum ms between two plays, priority)
+# When all channels are busy, a sound takes over the channel of a less important one
+SOUND_GROUPS = {
+    "tnt": (4, 50, 3),
+    "stone": (3, 60, 2),
+    "grass": (2, 80, 1),
+}
+DEFAULT_GROUP = (2, 50, 0)
+MAX_VOICES = 16  # Mixer channels, for all groups together
 
 class SoundManager:
-    def __init__(self):
-        pygame.mixer.init()  # Initialize the mixer
-        pygame.mixer.set_num_channels(128)
+    def __init__(self, enabled=True, channels=MAX_VOICES, clock=pygame.time.get_ticks):
+        self.enabled = enabled  # Headless runs have no audio device
+        if self.enabled:
+            pygame.mixer.init()  # Initialize the mixer
+            pygame.mixer.set_num_channels(channels)
+        self.clock = clock  # Sounds are limited in real time, not game time
         self.sounds = {}
+        self.groups = {}  # Group of each sound
+        self.voices = {}  # (group, priority) of the sound each channel was started with
+        self.last_played = {}  # Time each group was last played
+        self.played = Counter()  # Plays per group
+        self.dropped = Counter()  # Plays per group skipped because of the limits
+
+    def load_sound(self, name, path, volume=1.0, group=None):
+        """
+        Load a sound and set its volume.
 
-    def load_sound(self, name, path, volume=1.0):
-        """Load a sound and set its volume"""
+        :param group: Sounds of a group share its limits (default: the name without trailing digits).
+        """
+        if not self.enabled:
+            return
         sound = pygame.mixer.Sound(str(path))
         sound.set_volume(volume)
         self.sounds[name] = sound
+        self.groups[name] = group or name.rstrip("0123456789")
 
     def play_sound(self, name, loop=False):
-        """Play a loaded sound"""
-        if name in self.sounds:
-            self.sounds[name].play(loops=-1 if loop else 0)
+        """
+        Play a loaded sound, unless its group is at its limits (then it is counted in `dropped`).
+
+        :return: True if the sound was started.
+        """
+        if name not in self.sounds:
+            return False
+        group = self.groups[name]
+        max_voices, min_interval, priority = SOUND_GROUPS.get(group, DEFAULT_GROUP)
+
+        now = self.clock()
+        last = self.last_played.get(group)
+        if last is not None and now - last < min_interval:
+            self.dropped[group] += 1
+            return False
+
+        # Forget the voices that finished
+        self.voices = {channel: voice for channel, voice in self.voices.items() if channel.get_busy()}
+        if sum(1 for voice_group, _ in self.voices.values() if voice_group == group) >= max_voices:
+            self.dropped[group] += 1
+            return False
+
+        channel = pygame.mixer.find_channel()
+        if channel is None:
+            # Every channel is busy: take over the least important voice, if it matters less than this one
+            channel = min(self.voices, key=lambda c: self.voices[c][1], default=None)
+            if channel is None or self.voices[channel][1] >= priority:
+                self.dropped[group] += 1
+                return False
+            channel.stop()
+
+        channel.play(self.sounds[name], loops=-1 if loop else 0)
+        self.voices[channel] = (group, priority)
+        self.last_played[group] = now
+        self.played[group] += 1
+        return True
 
     def stop_sound(self, name):
         """Stop a playing sound"""
@@ -24,4 +83,5 @@ class SoundManager:
 
     def stop_all(self):
         """Stop all sounds"""
-        pygame.mixer.stop()
+        if self.enabled:
+            pygame.mixer.stop()
@@ -0,0 +1,73 @@
+import pygame
+from collections import OrderedDict
+
+ANGLE_STEP = 2  # Rotations are rounded to this many degrees
+CACHE_BYTES = 64 * 1024 * 1024  # Pixel memory of the rotated surfaces kept, least recently used ones are dropped first
+
+_cache = OrderedDict()
+_cache_bytes = 0
+_overlays = {}  # Plain white overlays by size
+
+def _surface_bytes(surface):
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+def _cached(key, create):
+    global _cache_bytes
+    surface = _cache.get(key)
+    if surface is None:
+        surface = create()
+        _cache[key] = surface
+        _cache_bytes += _surface_bytes(surface)
+        while _cache_bytes > CACHE_BYTES and len(_cache) > 1:
+            _, dropped = _cache.popitem(last=False)
+            _cache_bytes -= _surface_bytes(dropped)
+    else:
+        _cache.move_to_end(key)
+    return surface
+
+def _angle_bucket(angle):
+    return round(angle / ANGLE_STEP) % (360 // ANGLE_STEP)
+
+def rotated(texture, angle, scale=1, key=None):
+    """
+    Get a texture rotated by `angle` degrees (counterclockwise, like pygame.transform.rotate).
+
+    Textures are cached by identity, so pass the same surface object every frame.
+
+    :param scale: Size factor applied before rotating, for drawing at window size.
+    :param key: Identifies the texture instead of the surface object, for textures that are recreated
+                with the same contents (e.g. the pickaxe when it changes or grows).
+    """
+    bucket = _angle_bucket(angle)
+
+    def create():
+        scaled_texture = texture
+        if scale != 1:
+            scaled_texture = pygame.transform.scale(texture, scaled_size(texture.get_size(), scale))
+        return pygame.transform.rotate(scaled_texture, bucket * ANGLE_STEP)
+
+    return _cached((texture if key is None else key, bucket, scale), create)
+
+def scaled_size(size, scale):
+    """Size of a texture drawn with `scale`."""
+    return (max(1, round(size[0] * scale)), max(1, round(size[1] * scale)))
+
+def rotated_overlay(size, angle, alpha):
+    """
+    Get a white box of `size`, rotated by `angle` degrees and drawn with `alpha` opacity.
+
+    Only the rotation is cached, the alpha is set on the shared surface, so blit it before the next call.
+    """
+    bucket = _angle_bucket(angle)
+
+    def create():
+        overlay = _overlays.get(size)
+        if overlay is None:
+            overlay = pygame.Surface(size, pygame.SRCALPHA)
+            overlay.fill((255, 255, 255))
+            _overlays[size] = overlay
+        return pygame.transform.rotate(overlay, bucket * ANGLE_STEP)
+
+    surface = _cached(("overlay", size, bucket), create)
+    surface.set_alpha(alpha)
+    return surface
@@ -0,0 +1,76 @@
+import pygame
+from collections import OrderedDict
+
+CACHE_SIZE = 256  # Rendered labels and glyphs kept, least recently used ones are dropped first
+
+_cache = OrderedDict()
+
+def _cached(key, create):
+    surface = _cache.get(key)
+    if surface is None:
+        surface = create()
+        _cache[key] = surface
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    else:
+        _cache.move_to_end(key)
+    return surface
+
+def _outline(text, font, outline_color, outline_width):
+    # The text rendered once in the outline color, stamped around the center
+    stamp = font.render(text, True, outline_color)
+    w, h = stamp.get_size()
+    outline_surface = pygame.Surface((w + 2 * outline_width, h + 2 * outline_width), pygame.SRCALPHA)
+    for dx in range(-outline_width, outline_width + 1):
+        for dy in range(-outline_width, outline_width + 1):
+            if dx != 0 or dy != 0:
+                outline_surface.blit(stamp, (dx + outline_width, dy + outline_width))
+    return outline_surface
+
+def outlined(text, font, text_color=(255, 255, 255), outline_color=(0, 0, 0), outline_width=2):
+    """Get `text` rendered with an outline, from the cache if it was rendered before."""
+    def create():
+        surface = _outline(text, font, outline_color, outline_width)
+        surface.blit(font.render(text, True, text_color), (outline_width, outline_width))
+        return surface
+
+    return _cached(("outlined", text, font, text_color, outline_color, outline_width), create)
+
+def shadowed(text, font, text_color=(255, 255, 255), shadow_color=(0, 0, 0)):
+    """Get `text` with a shadow one pixel down and right, from the cache if it was rendered before."""
+    def create():
+        text_surface = font.render(text, True, text_color)
+        w, h = text_surface.get_size()
+        surface = pygame.Surface((w + 1, h + 1), pygame.SRCALPHA)
+        surface.blit(font.render(text, True, shadow_color), (1, 1))
+        surface.blit(text_surface, (0, 0))
+        return surface
+
+    return _cached(("shadowed", text, font, text_color, shadow_color), create)
+
+def _glyph(char, font, text_color, outline_color, outline_width):
+    # Outline and fill are kept apart so all outlines of a string can go below all fills
+    return _cached(("glyph", char, font, text_color, outline_color, outline_width),
+                   lambda: (_outline(char, font, outline_color, outline_width), font.render(char, True, text_color), font.size(char)[0]))
+
+def draw_outlined(screen, text, position, font, text_color=(255, 255, 255), outline_color=(0, 0, 0), outline_width=2):
+    """
+    Draw outlined text from cached glyphs, for text that changes often like numbers.
+
+    Characters are placed by their own advance, so the result can be a pixel or two off
+    from `outlined`, which lays out the whole string at once.
+
+    :return: The rect covered by the text.
+    """
+    x, y = position
+    glyphs = []
+    for char in text:
+        glyph = _glyph(char, font, text_color, outline_color, outline_width)
+        glyphs.append((x, glyph))
+        x += glyph[2]
+
+    for glyph_x, (outline_surface, _, _) in glyphs:
+        screen.blit(outline_surface, (glyph_x, y))
+    for glyph_x, (_, fill, _) in glyphs:
+        screen.blit(fill, (glyph_x + outline_width, y + outline_width))
+    return pygame.Rect(position, (x - position[0] + 2 * outline_width, font.get_height() + 2 * outline_width))
@@ -1,11 +1,63 @@
 import pygame
+import gametime
 import pymunk
 import math
 import random
 from constants import BLOCK_SIZE
 from constants import CHUNK_HEIGHT, CHUNK_WIDTH
 from chunk import chunks
-from explosion import Explosion
+from collisions import TNT
+from block import AIR
+from physics import interpolated, registry
+from sprites import rotated, rotated_overlay, scaled_size
+from text import shadowed
+
+# Explosion kernels are computed for this many TNT positions per cell along each axis
+KERNEL_SUBDIVISIONS = 4
+_kernel_cache = {}
+
+# Scaled TNT textures shared by all TNT, so their rotations are cached once
+_texture_cache = {}
+
+def tnt_texture(texture_atlas, atlas_items, name, scale=1):
+    cache_key = (id(texture_atlas), name, scale)
+    if cache_key not in _texture_cache:
+        texture = texture_atlas.subsurface(atlas_items["block"][name])
+        _texture_cache[cache_key] = pygame.transform.scale_by(texture, scale) if scale != 1 else texture
+    return _texture_cache[cache_key]
+
+def explosion_kernel(explosion_radius, damage_scale, sub_x=0, sub_y=0):
+    """
+    Damage falloff of an explosion on the block grid, computed once per radius and scale.
+
+    :param explosion_radius: Radius in pixels.
+    :param damage_scale: Multiplier of the base damage (100 at the center).
+    :param sub_x: Position of the TNT inside its cell along x, from 0 to KERNEL_SUBDIVISIONS - 1.
+    :param sub_y: Position of the TNT inside its cell along y, from 0 to KERNEL_SUBDIVISIONS - 1.
+    :return: List of (dx, dy, damage) cell offsets from the TNT's cell, ordered by dy then dx.
+    """
+    key = (explosion_radius, damage_scale, sub_x, sub_y)
+    kernel = _kernel_cache.get(key)
+    if kernel is not None:
+        return kernel
+
+    # TNT position relative to the top left corner of its cell
+    tnt_x = (sub_x + 0.5) / KERNEL_SUBDIVISIONS * BLOCK_SIZE
+    tnt_y = (sub_y + 0.5) / KERNEL_SUBDIVISIONS * BLOCK_SIZE
+    reach = int(explosion_radius // BLOCK_SIZE) + 1
+
+    kernel = []
+    for dy in range(-reach, reach + 1):
+        for dx in range(-reach, reach + 1):
+            distance = math.hypot(dx * BLOCK_SIZE + BLOCK_SIZE / 2 - tnt_x, dy * BLOCK_SIZE + BLOCK_SIZE / 2 - tnt_y)
+            if distance > explosion_radius:
+                continue
+            damage = int(100 * damage_scale * (1 - (distance / explosion_radius)))
+            if damage > 0:
+                kernel.append((dx, dy, damage))
+
+    _kernel_cache[key] = kernel
+    return kernel
 
 class Tnt:
     _font = None
@@ -15,8 +67,7 @@ class Tnt:
         self.texture_atlas = texture_atlas
         self.atlas_items = atlas_items
 
-        rect = atlas_items["block"]["tnt"]  
-        self.texture = texture_atlas.subsurface(rect)
+        self.texture = tnt_texture(texture_atlas, atlas_items, "tnt")
 
         width, height = self.texture.get_size()
 
@@ -34,66 +85,58 @@ class Tnt:
         # Create a hitbox
         self.shape = pymunk.Poly.create_box(self.body, (width, height))
         self.shape.elasticity = 1  # No bounce
-        self.shape.collision_type = 3 # Identifier for collisions
+        self.shape.collision_type = TNT
         self.shape.friction = 0.7
-        self.shape.block_ref = self  # Reference to the block object
+        self.shape.entity_ref = self  # Collisions are passed on to the TNT through this
 
         self.sound_manager = sound_manager
         self.sound_manager.play_sound("tnt")
 
-        self.space.add(self.body, self.shape)
-
-        handler = space.add_collision_handler(3, 2)  # TNT & Block collision
-        handler.post_solve = self.on_collision
+        registry(self.space).add(self.body, self.shape)
 
         self.detonated = False
-        self.spawn_time = pygame.time.get_ticks()
+        self.spawn_time = gametime.get_ticks()
 
         # Owner name (nick from chat)
         self.owner_name = owner_name
         if Tnt._font is None:
             Tnt._font = pygame.font.Font(None, 70)
         self.font = Tnt._font
+        if owner_name:
+            self.label = shadowed(owner_name, self.font)  # Rendered once per TNT
+            self.label_text_rect = pygame.Rect((0, 0), self.font.size(owner_name))
 
-        self._overlay_surface = pygame.Surface(self.texture.get_size(), pygame.SRCALPHA)
-        self._overlay_surface.fill((255, 255, 255))
-
-    def on_collision(self, arbiter, space, data):
-        # Small random rotation on collision
+    def on_collision(self, arbiter):
+        # Small random rotation when the TNT lands on a block
         self.body.angle += random.choice([0.01, -0.01])
 
     def _explode_with_radius(self, explosions, explosion_radius, damage_scale, particle_count):
         self.detonated = True
-        radius_sq = explosion_radius * explosion_radius
-        chunk_width_px = CHUNK_WIDTH * BLOCK_SIZE
-        chunk_height_px = CHUNK_HEIGHT * BLOCK_SIZE
-
-        min_chunk_x = int((self.body.position.x - explosion_radius) // chunk_width_px)
-        max_chunk_x = int((self.body.position.x + explosion_radius) // chunk_width_px)
-        min_chunk_y = int((self.body.position.y - explosion_radius) // chunk_height_px)
-        max_chunk_y = int((self.body.position.y + explosion_radius) // chunk_height_px)
-
-        for chunk_x in range(min_chunk_x, max_chunk_x + 1):
-            for chunk_y in range(min_chunk_y, max_chunk_y + 1):
-                chunk = chunks.get((chunk_x, chunk_y))
-                if chunk is None:
-                    continue
-                for row in chunk:
-                    for block in row:
-                        if block is None or getattr(block, "destroyed", False):
-                            continue
-
-                        dx = block.body.position.x - self.body.position.x
-                        dy = block.body.position.y - self.body.position.y
-                        dist_sq = dx * dx + dy * dy
-
-                        if dist_sq <= radius_sq:
-                            distance = math.sqrt(dist_sq)
-                            damage = int(100 * damage_scale * (1 - (distance / explosion_radius)))
-                            block.hp -= damage
-
-        explosion = Explosion(self.body.position, self.texture_atlas, self.atlas_items, particle_count=particle_count)
-        explosions.append(explosion)
+        current_time = gametime.get_ticks()
+
+        # Cell of the TNT in world grid coordinates, and where inside that cell it is
+        grid_x = self.body.position.x / BLOCK_SIZE
+        grid_y = self.body.position.y / BLOCK_SIZE
+        cell_x, cell_y = math.floor(grid_x), math.floor(grid_y)
+        sub_x = int((grid_x - cell_x) * KERNEL_SUBDIVISIONS)
+        sub_y = int((grid_y - cell_y) * KERNEL_SUBDIVISIONS)
+
+        chunk = None
+        chunk_key = None
+        for dx, dy, damage in explosion_kernel(explosion_radius, damage_scale, sub_x, sub_y):
+            block_x, block_y = cell_x + dx, cell_y + dy
+            key = (block_x // CHUNK_WIDTH, block_y // CHUNK_HEIGHT)
+            if key != chunk_key:
+                chunk_key = key
+                chunk = chunks.get(key)
+            if chunk is None:
+                continue
+
+            index = (block_y % CHUNK_HEIGHT) * CHUNK_WIDTH + block_x % CHUNK_WIDTH
+            if chunk.types[index] != AIR:
+                chunk.block(index).damage(damage, current_time)
+
+        explosions.explode(self.body.position, particle_count)
 
     def explode(self, explosions):
         explosion_radius = 3 * BLOCK_SIZE  # Explosion radius in pixels
@@ -101,7 +144,7 @@ class Tnt:
 
     def update(self, tnt_list, explosions, camera, current_time=None):
         if self.detonated:
-            self.space.remove(self.body, self.shape)
+            registry(self.space).remove(self.body, self.shape)
             if self in tnt_list:
                 tnt_list.remove(self)
             return
@@ -111,43 +154,48 @@ class Tnt:
             self.body.velocity = (self.body.velocity.x, 1000)
 
         if current_time is None:
-            current_time = pygame.time.get_ticks()
+            current_time = gametime.get_ticks()
         if current_time - self.spawn_time >= 4000:
             self.explode(explosions)
             camera.shake(10, 10)  # Shake camera for 10 frames with intensity 10
 
-    def draw(self, screen, camera):
+    def draw(self, screen, camera, alpha=1):
+        """
+        Draw the TNT and its owner label, and return the rect they cover (None once detonated).
+
+        :param alpha: Where to draw it between its last two physics steps, see `interpolated`.
+        """
         if self.detonated:
-            return
+            return None
 
         # Draw TNT texture with rotation
-        rotated_image = pygame.transform.rotate(self.texture, -math.degrees(self.body.angle))
-        rect = rotated_image.get_rect(center=(self.body.position.x, self.body.position.y))
-        rect.y -= camera.offset_y
-        rect.x -= camera.offset_x
+        scale = camera.scale
+        (x, y), angle = interpolated(self.body, alpha)
+        center = ((x - camera.offset_x) * scale, (y - camera.offset_y) * scale)
+        rotated_image = rotated(self.texture, -math.degrees(angle), scale)
+        rect = rotated_image.get_rect(center=center)
         screen.blit(rotated_image, rect)
 
         # Blinking effect: pulsating white overlay
         blink_period = 500  # 1 second cycle
-        current_time = pygame.time.get_ticks() % blink_period
+        current_time = gametime.get_ticks() % blink_period
         brightness = (math.sin(current_time / blink_period * 2 * math.pi) + 1) / 2  # range 0-1
-        alpha = int(brightness * 192)  # maximum 75% opacity
+        opacity = int(brightness * 192)  # maximum 75% opacity
 
-        self._overlay_surface.set_alpha(alpha)
-        rotated_overlay = pygame.transform.rotate(self._overlay_surface, -math.degrees(self.body.angle))
-        overlay_rect = rotated_overlay.get_rect(center=(self.body.position.x, self.body.position.y))
-        overlay_rect.y -= camera.offset_y
-        overlay_rect.x -= camera.offset_x
-        screen.blit(rotated_overlay, overlay_rect)
+        overlay = rotated_overlay(scaled_size(self.texture.get_size(), scale), -math.degrees(angle), opacity)
+        overlay_rect = overlay.get_rect(center=center)
+        screen.blit(overlay, overlay_rect)
+        drawn = rect.union(overlay_rect)
 
         # Draw owner name above TNT
         if self.owner_name:
-            text_surface = self.font.render(self.owner_name, True, (255, 255, 255))
-            text_rect = text_surface.get_rect(center=(self.body.position.x - camera.offset_x, self.body.position.y - 55 - camera.offset_y))
-            shadow = self.font.render(self.owner_name, True, (0, 0, 0))
-            shadow_rect = shadow.get_rect(center=(self.body.position.x + 1 - camera.offset_x, self.body.position.y - 54 - camera.offset_y))
-            screen.blit(shadow, shadow_rect)
-            screen.blit(text_surface, text_rect)
+            # The text is centered above the TNT, the shadow hangs one pixel past it
+            label = rotated(self.label, 0, scale)
+            text_rect = pygame.Rect((0, 0), scaled_size(self.label_text_rect.size, scale))
+            text_rect.center = (center[0], center[1] - 55 * scale)
+            screen.blit(label, text_rect.topleft)
+            drawn.union_ip(label.get_rect(topleft=text_rect.topleft))
+        return drawn
 
 class MegaTnt(Tnt):
     def __init__(self, space, x, y, texture_atlas, atlas_items, sound_manager, owner_name=None, velocity=0, rotation=0, mass=100):
@@ -156,21 +204,17 @@ class MegaTnt(Tnt):
         self.name = "mega_tnt"
         self.scale_multiplier = 2
 
-        rect = atlas_items["block"]["mega_tnt"]
-        self.texture = pygame.transform.scale_by(texture_atlas.subsurface(rect), self.scale_multiplier)
+        self.texture = tnt_texture(texture_atlas, atlas_items, "mega_tnt", self.scale_multiplier)
 
         width, height = self.texture.get_size()
         self.shape.unsafe_set_vertices(pymunk.Poly.create_box(self.body, (width, height)).get_vertices())
-        self._overlay_surface = pygame.Surface(self.texture.get_size(), pygame.SRCALPHA)
-        self._overlay_surface.fill((255, 255, 255))
-
     def explode(self, explosions):
         explosion_radius = 3 * BLOCK_SIZE * self.scale_multiplier
         self._explode_with_radius(explosions, explosion_radius, self.scale_multiplier, 40)
 
     def update(self, tnt_list, explosions, camera, current_time=None):
         if self.detonated:
-            self.space.remove(self.body, self.shape)
+            registry(self.space).remove(self.body, self.shape)
             if self in tnt_list:
                 tnt_list.remove(self)
             return
@@ -180,39 +224,39 @@ class MegaTnt(Tnt):
             self.body.velocity = (self.body.velocity.x, 1000)
 
         if current_time is None:
-            current_time = pygame.time.get_ticks()
+            current_time = gametime.get_ticks()
         if current_time - self.spawn_time >= 4000:
             self.explode(explosions)
             camera.shake(15, 30)  # Shake camera for 15 frames with intensity 15
 
-    def draw(self, screen, camera):
+    def draw(self, screen, camera, alpha=1):
         if self.detonated:
-            return
+            return None
 
-        rotated_image = pygame.transform.rotate(self.texture, -math.degrees(self.body.angle))
-        rect = rotated_image.get_rect(center=(self.body.position.x, self.body.position.y))
-        rect.y -= camera.offset_y
-        rect.x -= camera.offset_x
+        scale = camera.scale
+        (x, y), angle = interpolated(self.body, alpha)
+        center = ((x - camera.offset_x) * scale, (y - camera.offset_y) * scale)
+        rotated_image = rotated(self.texture, -math.degrees(angle), scale)
+        rect = rotated_image.get_rect(center=center)
         screen.blit(rotated_image, rect)
 
         # Blinking effect: pulsating white overlay
         blink_period = 500
-        current_time = pygame.time.get_ticks() % blink_period
+        current_time = gametime.get_ticks() % blink_period
         brightness = (math.sin(current_time / blink_period * 2 * math.pi) + 1) / 2
-        alpha = int(brightness * 192)
+        opacity = int(brightness * 192)
 
-        self._overlay_surface.set_alpha(alpha)
-        rotated_overlay = pygame.transform.rotate(self._overlay_surface, -math.degrees(self.body.angle))
-        overlay_rect = rotated_overlay.get_rect(center=(self.body.position.x, self.body.position.y))
-        overlay_rect.y -= camera.offset_y
-        overlay_rect.x -= camera.offset_x
-        screen.blit(rotated_overlay, overlay_rect)
+        overlay = rotated_overlay(scaled_size(self.texture.get_size(), scale), -math.degrees(angle), opacity)
+        overlay_rect = overlay.get_rect(center=center)
+        screen.blit(overlay, overlay_rect)
+        drawn = rect.union(overlay_rect)
 
         # Draw owner name above MegaTNT
         if self.owner_name:
-            text_surface = self.font.render(self.owner_name, True, (255, 255, 255))
-            text_rect = text_surface.get_rect(center=(self.body.position.x - camera.offset_x, self.body.position.y - 55 - camera.offset_y))
-            shadow = self.font.render(self.owner_name, True, (0, 0, 0))
-            shadow_rect = shadow.get_rect(center=(self.body.position.x + 1 - camera.offset_x, self.body.position.y - 54 - camera.offset_y))
-            screen.blit(shadow, shadow_rect)
-            screen.blit(text_surface, text_rect)
+            # The text is centered above the TNT, the shadow hangs one pixel past it
+            label = rotated(self.label, 0, scale)
+            text_rect = pygame.Rect((0, 0), scaled_size(self.label_text_rect.size, scale))
+            text_rect.center = (center[0], center[1] - 55 * scale)
+            screen.blit(label, text_rect.topleft)
+            drawn.union_ip(label.get_rect(topleft=text_rect.topleft))
+        return drawn
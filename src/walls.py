@@ -0,0 +1,60 @@
+import pygame
+import pymunk
+from collisions import WALL
+from physics import registry
+from constants import BLOCK_SIZE, CHUNK_WIDTH, INTERNAL_HEIGHT
+
+# Length of the wall segments. They are moved along with the camera, so they only
+# need to reach past everything that can collide with them.
+WALL_LENGTH = INTERNAL_HEIGHT * 4
+# Walls are thick capsules so an enlarged pickaxe overlapping them is pushed back into the shaft
+WALL_RADIUS = CHUNK_WIDTH * BLOCK_SIZE
+# Width of the bedrock strip drawn on each side (covers camera shake)
+STRIP_WIDTH = BLOCK_SIZE * 3
+
+class Walls:
+    """The bedrock walls on both sides of the shaft."""
+
+    def __init__(self, space, texture_atlas, atlas_items):
+        self.space = space
+
+        # The inner faces of the walls sit where the old bedrock columns started and ended
+        left_x = BLOCK_SIZE - WALL_RADIUS
+        right_x = (CHUNK_WIDTH - 1) * BLOCK_SIZE + WALL_RADIUS
+        half_length = WALL_LENGTH / 2
+
+        self.body = pymunk.Body(body_type=pymunk.Body.STATIC)
+        self.body.position = (0, 0)
+        self.shapes = []
+        for x in (left_x, right_x):
+            shape = pymunk.Segment(self.body, (x, -half_length), (x, half_length), WALL_RADIUS)
+            shape.elasticity = 1
+            shape.friction = 1
+            shape.collision_type = WALL
+            self.shapes.append(shape)
+        registry(space).add(self.body, *self.shapes)
+
+        # Bedrock tiled once into a strip a bit taller than the screen
+        bedrock = texture_atlas.subsurface(atlas_items["block"]["bedrock"])
+        self.strip = pygame.Surface((STRIP_WIDTH, INTERNAL_HEIGHT + BLOCK_SIZE), pygame.SRCALPHA)
+        for y in range(0, self.strip.get_height(), BLOCK_SIZE):
+            for x in range(0, STRIP_WIDTH, BLOCK_SIZE):
+                self.strip.blit(bedrock, (x, y))
+        self.scaled_strip = (1, self.strip)  # The strip at the scale it was last drawn with
+
+    def update(self, center_y):
+        """Move the walls along with the camera once it gets close to their ends."""
+        if abs(center_y - self.body.position.y) > WALL_LENGTH / 4:
+            self.body.position = (0, center_y)
+            self.space.reindex_shapes_for_body(self.body)
+
+    def draw(self, screen, camera):
+        """Draw the bedrock strips, aligned to the block grid."""
+        if self.scaled_strip[0] != camera.scale:
+            size = (round(self.strip.get_width() * camera.scale), round(self.strip.get_height() * camera.scale))
+            self.scaled_strip = (camera.scale, pygame.transform.scale(self.strip, size))
+        strip = self.scaled_strip[1]
+
+        y = -(camera.offset_y % BLOCK_SIZE) * camera.scale
+        screen.blit(strip, ((BLOCK_SIZE - STRIP_WIDTH - camera.offset_x) * camera.scale, y))
+        screen.blit(strip, (((CHUNK_WIDTH - 1) * BLOCK_SIZE - camera.offset_x) * camera.scale, y))
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Test the batch simulation plan and report
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from batch import ORES, expand_plan, summarize
+
+
+def test_plan_runs_every_seed_with_its_overrides():
+    plan = {
+        "seconds": 300,
+        "seeds": [1, 2],
+        "runs": [
+            {"name": "default"},
+            {"name": "more tnt", "config": {"TNT_AMOUNT_ON_SUPERCHAT": 20}, "seconds": 60, "seeds": [5]},
+        ],
+    }
+    simulations = expand_plan(plan)
+    assert simulations == [
+        {"name": "default", "seed": 1, "seconds": 300, "config": {}},
+        {"name": "default", "seed": 2, "seconds": 300, "config": {}},
+        {"name": "more tnt", "seed": 5, "seconds": 60, "config": {"TNT_AMOUNT_ON_SUPERCHAT": 20}},
+    ]
+
+
+def result(name, depth, coal, peak_bodies):
+    return {"name": name, "depth": depth, **dict.fromkeys(ORES, 0), "coal": coal,
+            "frame_p50": 1.0, "frame_p95": 2.0, "frame_p99": 4.0, "peak_bodies": peak_bodies}
+
+
+def test_summary_combines_the_seeds_of_a_run():
+    summary = summarize([result("a", 10, 2, 8), result("a", 20, 4, 12), result("b", 5, 1, 3)])
+    assert summary["a"]["simulations"] == 2
+    assert summary["a"]["depth"] == 15
+    assert (summary["a"]["depth_min"], summary["a"]["depth_max"]) == (10, 20)  # Shallowest and deepest
+    assert summary["a"]["coal"] == 3
+    assert summary["a"]["peak_bodies"] == 12
+    assert summary["b"]["simulations"] == 1
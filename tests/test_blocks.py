@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test healing and destruction of damaged blocks
+"""
+
+import os
+import sys
+from collections import Counter
+
+import pymunk
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import block
+from block import BLOCK_IDS, destroy_blocks, update_blocks
+from chunk import AIR, Chunk
+from constants import CHUNK_HEIGHT, CHUNK_WIDTH
+
+
+class Hud:
+    def __init__(self):
+        self.amounts = Counter()
+
+
+@pytest.fixture(autouse=True)
+def empty_queues():
+    block._heal_queue.clear()
+    block._destroyed_queue.clear()
+    yield
+    block._heal_queue.clear()
+    block._destroyed_queue.clear()
+
+
+def stone_chunk():
+    # Never attached or drawn, like a chunk below the screen
+    return Chunk(0, 0, [BLOCK_IDS["stone"]] * (CHUNK_WIDTH * CHUNK_HEIGHT))
+
+
+def test_heals_a_fifth_of_max_hp_every_five_seconds_until_full():
+    chunk = stone_chunk()
+    chunk.block(0).hit(6, 0)
+    assert chunk.hp[0] == 4
+
+    update_blocks(4999)
+    assert chunk.hp[0] == 4
+    update_blocks(5000)
+    assert chunk.hp[0] == 6
+    update_blocks(10000)
+    assert chunk.hp[0] == 8
+    update_blocks(15000)
+    assert chunk.hp[0] == 10
+
+    # Fully healed blocks are no longer tracked
+    assert 0 not in chunk.blocks
+    assert block._heal_queue == []
+
+
+def test_hit_restarts_the_countdown():
+    chunk = stone_chunk()
+    chunk.block(0).hit(2, 0)
+    chunk.block(0).hit(2, 4000)
+    update_blocks(5000)
+    assert chunk.hp[0] == 6
+    update_blocks(9000)
+    assert chunk.hp[0] == 8
+
+
+def test_damage_keeps_the_countdown():
+    chunk = stone_chunk()
+    chunk.block(0).hit(2, 0)
+    chunk.block(0).damage(2, 4000)
+    update_blocks(5000)
+    assert chunk.hp[0] == 8
+
+
+def test_broken_block_is_destroyed_not_healed():
+    chunk = stone_chunk()
+    chunk.block(0).hit(10, 0)
+    update_blocks(5000)
+    assert chunk.hp[0] == 0
+
+    assert destroy_blocks(None, Hud()) == 1
+    assert chunk.types[0] == AIR
+    update_blocks(10000)
+    assert chunk.hp[0] == 0
+
+
+def test_blocks_heal_while_off_screen():
+    # Healing no longer waits for the chunk to be drawn
+    chunks = [stone_chunk() for _ in range(3)]
+    for chunk in chunks:
+        chunk.block(5).hit(4, 0)
+    update_blocks(5000)
+    assert [chunk.hp[5] for chunk in chunks] == [8, 8, 8]
+    assert all(chunk.surface is None for chunk in chunks)
+
+
+def test_block_broken_twice_in_a_step_is_destroyed_once():
+    chunk = Chunk(0, 0, [BLOCK_IDS["coal_ore"]] * (CHUNK_WIDTH * CHUNK_HEIGHT))
+    chunk.block(0).hit(15, 0)
+    chunk.block(0).hit(15, 0)  # A second contact in the same step
+    assert len(block._destroyed_queue) == 1
+
+    hud = Hud()
+    assert destroy_blocks(None, hud) == 1
+    assert hud.amounts["coal"] == 1
+    assert destroy_blocks(None, hud) == 0
+
+
+def test_removed_cells_leave_shapes_on_exactly_the_solid_cells():
+    space = pymunk.Space()
+    chunk = stone_chunk()
+    chunk.attach(space)
+
+    removed = [0, 5, 6, CHUNK_WIDTH + 5, 3 * CHUNK_WIDTH + 2, CHUNK_WIDTH * CHUNK_HEIGHT - 1]
+    chunk.remove_cells(removed, space)
+
+    covered = []
+    for shape in chunk.shapes:
+        x0, y0, x1, y1 = shape.cells
+        covered.extend(y * CHUNK_WIDTH + x for y in range(y0, y1) for x in range(x0, x1))
+    assert sorted(covered) == [index for index in range(CHUNK_WIDTH * CHUNK_HEIGHT) if index not in removed]
+    assert set(space.shapes) == chunk.shapes
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Test checkpoint encoding round trip
+"""
+
+import os
+import sys
+from array import array
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from checkpoint import decode, encode
+
+
+def test_round_trip():
+    meta = {"pickaxe": {"name": "iron_pickaxe", "position": [540.0, 9000.5]}, "amounts": {"coal": 3}, "tnt": [], "timers": {}}
+    types = array("B", [0, 2, 3, 16])
+    hp = array("d", [0, 10, 4.5, 22])
+    chunk_records = [(0, 5, types.tobytes(), hp.tobytes(), [(2, 3500)])]
+
+    decoded_meta, decoded_chunks = decode(encode(meta, chunk_records))
+
+    assert decoded_meta == meta
+    assert decoded_chunks == [(0, 5, types, hp, [(2, 3500)])]
+
+
+def test_rejects_other_files():
+    with pytest.raises(ValueError):
+        decode(b"not a checkpoint at all")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test chunk generation: determinism per chunk and block distribution
+"""
+
+import os
+import random
+import sys
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from block import AIR, BLOCK_IDS
+from chunk import block_weights, generate_chunk, merge_cells
+from constants import CHUNK_HEIGHT, CHUNK_WIDTH
+
+
+def test_same_chunk_same_contents():
+    first = generate_chunk(0, 7)
+    # Unrelated use of the global random module must not change the world
+    random.random()
+    assert generate_chunk(0, 7) == first
+    assert generate_chunk(0, 8) != first
+
+
+def test_chunk_layout():
+    types = generate_chunk(0, 3)
+    assert len(types) == CHUNK_WIDTH * CHUNK_HEIGHT
+    # The outer columns belong to the bedrock side walls
+    for y in range(CHUNK_HEIGHT):
+        assert types[y * CHUNK_WIDTH] == AIR
+        assert types[y * CHUNK_WIDTH + CHUNK_WIDTH - 1] == AIR
+        assert AIR not in types[y * CHUNK_WIDTH + 1:(y + 1) * CHUNK_WIDTH - 1]
+
+
+def test_distribution_follows_weights():
+    counts = Counter()
+    for chunk_y in range(1, 301):
+        types = generate_chunk(0, chunk_y)
+        for y in range(CHUNK_HEIGHT):
+            counts.update(types[y * CHUNK_WIDTH + 1:(y + 1) * CHUNK_WIDTH - 1])
+
+    total_cells = sum(counts.values())
+    total_weight = sum(block_weights.values())
+    for name, weight in block_weights.items():
+        expected = weight / total_weight
+        assert abs(counts[BLOCK_IDS[name]] / total_cells - expected) < 0.01, name
+
+
+def test_merged_shapes_cover_solid_cells_once():
+    types = generate_chunk(0, 5)
+    types[3 * CHUNK_WIDTH + 4] = AIR
+    types[3 * CHUNK_WIDTH + 5] = AIR
+    covered = Counter()
+    for x0, y0, x1, y1 in merge_cells(types):
+        for y in range(y0, y1):
+            for x in range(x0, x1):
+                covered[y * CHUNK_WIDTH + x] += 1
+
+    solid = {index for index, block_type in enumerate(types) if block_type != AIR}
+    assert set(covered) == solid
+    assert all(count == 1 for count in covered.values())
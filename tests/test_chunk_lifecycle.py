@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test that chunk rows are unloaded in order and removed from the space over time
+"""
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import pymunk
+import pytest
+
+import chunk
+from chunk import attach_ready_chunks, chunks, clean_chunks, evict_chunks, generate_chunk, get_chunk, prefetch_chunks
+
+
+@pytest.fixture
+def no_chunks():
+    yield
+    for pending in chunk._pending.values():
+        pending.cancel()
+    chunk._pending.clear()
+    chunks.clear()
+    chunk._rows.clear()
+    chunk._evicting.clear()
+
+
+def test_eviction_is_queued_and_drained():
+    space = pymunk.Space()
+    for chunk_y in range(6):
+        get_chunk(0, chunk_y, space)
+    bodies = len(space.bodies)
+
+    clean_chunks(3)
+    assert sorted(chunks) == [(0, 3), (0, 4), (0, 5)]
+    assert len(space.bodies) == bodies  # Nothing is removed from the space yet
+
+    assert evict_chunks(space, 0) == 1  # At least one chunk per call, even without budget
+    assert evict_chunks(space, 1000) == 2
+    assert len(space.bodies) == bodies - 3
+    assert evict_chunks(space, 1000) == 0
+
+    # A chunk waiting for eviction is taken back instead of being generated again
+    clean_chunks(5)
+    waiting = chunk._evicting[(0, 4)]
+    assert get_chunk(0, 4, space) is waiting
+    evict_chunks(space, 1000)
+    assert len(space.bodies) == 2
+
+    clean_chunks(100)
+    evict_chunks(space, 1000)
+    assert chunks == {} and len(space.bodies) == 0
+
+
+def test_prefetched_chunks_match_generated_ones(no_chunks):
+    space = pymunk.Space()
+    prefetch_chunks(3, 6)
+    assert sorted(chunk._pending) == [(0, 3), (0, 4), (0, 5)]
+    for pending in chunk._pending.values():
+        pending.result()
+
+    assert attach_ready_chunks(space, 1000) == 3
+    assert chunk._pending == {}
+    for chunk_y in range(3, 6):
+        assert list(chunks[(0, chunk_y)].types) == generate_chunk(0, chunk_y)
+        assert chunks[(0, chunk_y)].body in space.bodies
+
+
+def test_get_chunk_takes_the_pending_chunk(no_chunks):
+    space = pymunk.Space()
+    prefetch_chunks(7, 8)
+    prefetched = chunk._pending[(0, 7)].result()
+    assert get_chunk(0, 7, space) is prefetched
+    assert (0, 7) not in chunk._pending
+    assert prefetched.body in space.bodies
+
+
+def test_out_of_range_prefetches_are_cancelled(no_chunks):
+    # Keep the generation thread busy, so the prefetched rows are still waiting
+    release = threading.Event()
+    blocker = chunk._generation_pool.submit(release.wait, 10)
+    try:
+        prefetch_chunks(10, 14)
+        futures = dict(chunk._pending)
+        clean_chunks(12)
+        assert sorted(chunk._pending) == [(0, 12), (0, 13)]
+        assert futures[(0, 10)].cancelled() and futures[(0, 11)].cancelled()
+    finally:
+        release.set()
+        blocker.result()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test that the cached chunk surface only redraws changed cells and matches a fresh render
+"""
+
+import os
+import sys
+
+import pygame
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import block
+from atlas import create_texture_atlas, scale_texture_atlas
+from block import update_blocks
+from camera import Camera
+from chunk import Chunk, generate_chunk
+from constants import BLOCK_SCALE_FACTOR, BLOCK_SIZE, CHUNK_WIDTH
+
+ASSETS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "assets")
+
+
+@pytest.fixture(scope="module")
+def atlas():
+    atlas, items = create_texture_atlas(ASSETS)
+    return scale_texture_atlas(atlas, items, BLOCK_SCALE_FACTOR)
+
+
+@pytest.fixture(autouse=True)
+def empty_queues():
+    yield
+    block._heal_queue.clear()
+    block._destroyed_queue.clear()
+
+
+def cell_rect(index):
+    return pygame.Rect((index % CHUNK_WIDTH) * BLOCK_SIZE, (index // CHUNK_WIDTH) * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE)
+
+
+def fresh_render(chunk, atlas, camera):
+    fresh = Chunk(chunk.chunk_x, chunk.chunk_y, chunk.types)
+    fresh.hp = chunk.hp
+    fresh.blocks = dict(chunk.blocks)
+    fresh.refresh(*atlas, camera)
+    return fresh.surface
+
+
+def test_cached_surface_follows_damage_heals_and_breaks(atlas):
+    camera = Camera()
+    camera.offset_y = 3 * BLOCK_SIZE * 16  # Chunk at the top left of the screen
+    chunk = Chunk(0, 3, generate_chunk(0, 3))
+    solid = [index for index, block_type in enumerate(chunk.types) if block_type != 0]
+    damaged, healed, broken = solid[:3]
+
+    assert len(chunk.refresh(*atlas, camera)) == len(solid)  # Everything is drawn once
+    assert chunk.refresh(*atlas, camera) == []
+
+    chunk.block(healed).hit(2, 0)
+    chunk.block(damaged).hit(4, 1000)  # Heals after the other one
+    assert sorted(chunk.refresh(*atlas, camera)) == sorted([cell_rect(damaged), cell_rect(healed)])
+
+    # Heal one block fully, break another one
+    chunk.hp[healed] = chunk.block(healed).max_hp - 1
+    update_blocks(5000)
+    chunk.remove_cells([broken], None)
+    assert sorted(chunk.refresh(*atlas, camera)) == sorted([cell_rect(healed), cell_rect(broken)])
+
+    expected = fresh_render(chunk, atlas, camera)
+    assert pygame.image.tobytes(chunk.surface, "RGBA") == pygame.image.tobytes(expected, "RGBA")
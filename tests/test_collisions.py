@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test that contacts between the pickaxe and blocks count as hits once
+"""
+
+import os
+import sys
+
+import pymunk
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import collisions
+
+
+class Entity:
+    def __init__(self):
+        self.hits = 0
+        self.wall_hits = 0
+
+    def hit(self, block_shape, arbiter):
+        self.hits += 1
+
+    def hit_wall(self, arbiter):
+        self.wall_hits += 1
+
+
+def drop_on_block(step_rate, seconds=2, collision_type=collisions.BLOCK):
+    space = pymunk.Space()
+    space.gravity = (0, 1000)
+    collisions.setup(space)
+    collisions.setup(space)  # A second call keeps the handlers
+
+    ground = pymunk.Poly.create_box_bb(space.static_body, pymunk.BB(-500, 100, 500, 200))
+    ground.collision_type = collision_type
+    ground.friction = 1
+
+    entity = Entity()
+    body = pymunk.Body(100, pymunk.moment_for_box(100, (20, 20)))
+    body.position = (0, 80)  # Resting just above the block
+    shape = pymunk.Poly.create_box(body, (20, 20))
+    shape.collision_type = collisions.PICKAXE
+    shape.friction = 1
+    shape.entity_ref = entity
+    space.add(ground, body, shape)
+
+    for _ in range(int(seconds * step_rate)):
+        space.step(1 / step_rate)
+    return entity
+
+
+def test_resting_contact_is_one_hit_at_any_step_rate():
+    assert drop_on_block(60).hits == 1
+    assert drop_on_block(240).hits == 1
+
+
+def test_wall_contact_is_a_hit_without_damage():
+    entity = drop_on_block(60, collision_type=collisions.WALL)
+    assert (entity.hits, entity.wall_hits) == (0, 1)
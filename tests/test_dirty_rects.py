@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test that dirty rect rendering produces the same frames as full redraws
+"""
+
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from camera import Camera
+from render import DirtyRects
+
+SIZE = (200, 300)
+CELL = 20
+
+
+class Scene:
+    """A small world of colored cells, moving sprites and a HUD, drawn like the game draws its layers"""
+
+    def __init__(self):
+        self.background = pygame.Surface((SIZE[0], SIZE[1] * 2))
+        for y in range(0, SIZE[1] * 2, 4):
+            pygame.draw.line(self.background, (y % 256, 80, 255 - y % 256), (0, y), (SIZE[0], y))
+        self.cells = {(x, y): (40 * x % 256, 30 * y % 256, 90) for x in range(2, 8) for y in range(5, 14)}
+        self.sprites = [pygame.Rect(20, 25, 30, 30), pygame.Rect(120, 200, 25, 40)]
+        self.hud = 0
+        self.camera = Camera()
+
+    def cell_rect(self, cell):
+        return pygame.Rect(cell[0] * CELL - self.camera.offset_x, cell[1] * CELL - self.camera.offset_y, CELL, CELL)
+
+    def draw(self, surface):
+        def draw_world():
+            surface.blit(self.background, (-self.camera.offset_x, -self.camera.offset_y))
+            for cell, color in self.cells.items():
+                surface.fill(color, self.cell_rect(cell))
+
+        def draw_sprites():
+            for i, rect in enumerate(self.sprites):
+                surface.fill((255, 255 * i, 0), rect)
+            return [rect.copy() for rect in self.sprites]
+
+        def draw_hud():
+            rect = pygame.Rect(10, 10, 120, 30)
+            surface.fill((20 * self.hud, 200, 200), rect)
+            return rect
+
+        return draw_world, draw_sprites, draw_hud
+
+
+def full_frame(scene):
+    surface = pygame.Surface(SIZE)
+    draw_world, draw_sprites, draw_hud = scene.draw(surface)
+    draw_world()
+    draw_sprites()
+    draw_hud()
+    return surface
+
+
+def same_pixels(a, b):
+    return pygame.image.tobytes(a, "RGB") == pygame.image.tobytes(b, "RGB")
+
+
+def test_dirty_frames_match_full_redraws():
+    scene = Scene()
+    surface = pygame.Surface(SIZE)
+    dirty_rects = DirtyRects(surface)
+    assert dirty_rects.draw(scene.camera, [], scene.hud, *scene.draw(surface)) is None  # First frame is full
+
+    for frame in range(30):
+        scene.sprites[0].move_ip(4, 1)  # Passes under the HUD on its way
+        scene.sprites[1].move_ip(-3, -5)
+        changed = []
+        if frame % 7 == 3:
+            cell = (2 + frame % 6, 5 + frame % 9)
+            scene.cells[cell] = (255, 0, 255) if frame % 2 else (0, 0, 0)
+            changed.append(scene.cell_rect(cell))
+        if frame == 10:
+            scene.hud = 5
+        if frame == 20:
+            scene.sprites[1].topleft = (60, 20)  # Jumps under the HUD from far away
+
+        updated = dirty_rects.draw(scene.camera, changed, scene.hud, *scene.draw(surface))
+        assert updated is not None
+        assert same_pixels(surface, full_frame(scene))
+
+
+def test_camera_movement_and_large_changes_redraw_everything():
+    scene = Scene()
+    surface = pygame.Surface(SIZE)
+    dirty_rects = DirtyRects(surface)
+    dirty_rects.draw(scene.camera, [], scene.hud, *scene.draw(surface))
+
+    scene.camera.offset_y = 7.5
+    assert dirty_rects.draw(scene.camera, [], scene.hud, *scene.draw(surface)) is None
+    assert same_pixels(surface, full_frame(scene))
+
+    # Over half of the screen changed
+    changed = [pygame.Rect(0, 0, SIZE[0], SIZE[1] * 0.6)]
+    assert dirty_rects.draw(scene.camera, changed, scene.hud, *scene.draw(surface)) is None
+
+    assert dirty_rects.draw(scene.camera, [pygame.Rect(0, 0, 10, 10)], scene.hud, *scene.draw(surface)) is not None
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test that explosion damage from the cached kernels matches the per-block distance falloff
+"""
+
+import math
+import os
+import sys
+
+import pymunk
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import block
+import tnt
+from block import BLOCK_IDS, BLOCK_MAX_HP
+from chunk import Chunk, chunks
+from constants import BLOCK_SIZE, CHUNK_HEIGHT, CHUNK_WIDTH
+from tnt import KERNEL_SUBDIVISIONS, MegaTnt, Tnt, explosion_kernel
+
+
+class Explosions:
+    def explode(self, position, particle_count):
+        pass
+
+
+class FakeTnt:
+    _explode_with_radius = Tnt._explode_with_radius
+
+    def __init__(self, position, scale_multiplier=1):
+        self.body = pymunk.Body()
+        self.body.position = position
+        self.detonated = False
+        self.scale_multiplier = scale_multiplier
+
+
+@pytest.fixture
+def bedrock_chunks():
+    # Bedrock never breaks, so the HP it lost is the damage it took
+    chunks.clear()
+    for chunk_x in range(-1, 2):
+        for chunk_y in range(0, 3):
+            chunks[(chunk_x, chunk_y)] = Chunk(chunk_x, chunk_y, [BLOCK_IDS["bedrock"]] * (CHUNK_WIDTH * CHUNK_HEIGHT))
+    yield chunks
+    chunks.clear()
+    block._heal_queue.clear()
+
+
+def baseline_damage(position, explosion_radius, damage_scale):
+    """Damage per cell as computed block by block before the kernels"""
+    damage = {}
+    for key, chunk in chunks.items():
+        for index in range(CHUNK_WIDTH * CHUNK_HEIGHT):
+            x, y = chunk.cell_center(index)
+            distance = math.hypot(x - position[0], y - position[1])
+            if distance <= explosion_radius:
+                damage[(key, index)] = int(100 * damage_scale * (1 - (distance / explosion_radius)))
+    return damage
+
+
+@pytest.mark.parametrize("explosion_radius, damage_scale", [(3 * BLOCK_SIZE, 1), (6 * BLOCK_SIZE, 2)])
+@pytest.mark.parametrize("position", [(540, 2700), (601.5, 2699.9), (493.2, 2310.7), (180, 3900)])
+def test_kernel_damage_is_within_a_few_hp_of_the_exact_falloff(bedrock_chunks, position, explosion_radius, damage_scale):
+    Tnt._explode_with_radius(FakeTnt(position), Explosions(), explosion_radius, damage_scale, 0)
+
+    # The TNT is moved at most half a sub-cell diagonal, plus one HP for rounding
+    max_error = 100 * damage_scale / explosion_radius * BLOCK_SIZE * math.sqrt(2) / (2 * KERNEL_SUBDIVISIONS) + 1
+    expected = baseline_damage(position, explosion_radius, damage_scale)
+    for key, chunk in chunks.items():
+        for index in range(CHUNK_WIDTH * CHUNK_HEIGHT):
+            damage = BLOCK_MAX_HP[BLOCK_IDS["bedrock"]] - chunk.hp[index]
+            assert abs(damage - expected.get((key, index), 0)) <= max_error
+
+
+def test_tnt_and_mega_tnt_have_their_own_cached_kernels(bedrock_chunks):
+    tnt._kernel_cache.clear()
+    Tnt.explode(FakeTnt((540, 2700)), Explosions())
+    MegaTnt.explode(FakeTnt((540, 2700), 2), Explosions())
+    assert sorted(tnt._kernel_cache) == [(3 * BLOCK_SIZE, 1, 2, 2), (6 * BLOCK_SIZE, 2, 2, 2)]
+
+    small = explosion_kernel(3 * BLOCK_SIZE, 1, 2, 2)
+    mega = explosion_kernel(6 * BLOCK_SIZE, 2, 2, 2)
+    assert small is tnt._kernel_cache[(3 * BLOCK_SIZE, 1, 2, 2)]  # Not computed again
+    assert len(mega) > len(small)
+    assert max(damage for _, _, damage in mega) > max(damage for _, _, damage in small)
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test the fixed simulation step and the interpolation between steps
+"""
+
+import os
+import sys
+
+import pymunk
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from gametime import FixedStep
+from physics import interpolated, remember_positions
+
+
+def test_frames_are_turned_into_whole_steps():
+    fixed_step = FixedStep(10, 8)
+    assert fixed_step.steps(10) == 1
+    assert fixed_step.steps(5) == 0
+    assert fixed_step.alpha == pytest.approx(0.5)
+    assert fixed_step.steps(5) == 1  # The leftover of the last frame counts
+    assert fixed_step.steps(30) == 3
+
+
+def test_rate_changes_the_simulated_time():
+    fast = FixedStep(10, 8)
+    slow = FixedStep(10, 8)
+    assert sum(fast.steps(10, 2) for _ in range(10)) == 20
+    assert sum(slow.steps(10, 0.5) for _ in range(10)) == 5
+
+
+def test_stall_is_caught_up_to_the_limit():
+    fixed_step = FixedStep(10, 8)
+    assert fixed_step.steps(1000) == 8
+    assert fixed_step.steps(0) <= 1  # The rest of the stall was dropped
+
+
+def test_interpolated_position_between_steps():
+    body = pymunk.Body(1, 1)
+    assert interpolated(body, 0.5) == (body.position, body.angle)  # Never stepped
+
+    body.position = (0, 0)
+    remember_positions([body])
+    body.position = (10, 20)
+    body.angle = 1
+
+    (x, y), angle = interpolated(body, 0.25)
+    assert (x, y) == pytest.approx((2.5, 5))
+    assert angle == pytest.approx(0.25)
+    assert interpolated(body, 1)[0] == pytest.approx((10, 20))
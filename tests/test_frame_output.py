@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test writing raw frames to a named pipe
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from constants import INTERNAL_HEIGHT, INTERNAL_WIDTH
+from frame_output import FrameOutput
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo") or sys.byteorder != "little", reason="needs named pipes")
+def test_frames_are_written_or_dropped(tmp_path):
+    pipe = str(tmp_path / "frames")
+    output = FrameOutput(pipe, size=(4, 2))
+    assert os.path.exists(pipe)
+
+    # Nobody reads yet: the first frame waits for the reader, the next one is dropped
+    output.surface.fill((255, 0, 0))
+    assert output.submit()
+    output.surface.fill((0, 255, 0))
+    assert not output.submit()
+    assert output.dropped == 1
+
+    with open(pipe, "rb") as reader:
+        frame = reader.read(4 * 2 * 4)
+        assert frame[:3] == bytes((0, 0, 255))  # Blue, green, red
+        assert len(frame) == 4 * 2 * 4
+
+        output.close()
+        assert reader.read() == b""
+    assert output.written == 1
+
+
+def test_resumed_run_writes_only_whole_frames_to_stdout(tmp_path):
+    # A copy of the game, so the checkpoint is written to its own logs folder
+    shutil.copytree(os.path.join(REPO, "src"), tmp_path / "src", ignore=shutil.ignore_patterns("__pycache__"))
+    shutil.copy(os.path.join(REPO, "default.config.json"), tmp_path)
+    env = dict(os.environ, SDL_AUDIODRIVER="dummy")
+
+    def run(*args):
+        return subprocess.run([sys.executable, "src/main.py", "--frames", "30", *args],
+                              cwd=tmp_path, env=env, capture_output=True, timeout=120)
+
+    assert run("--output", os.devnull, "--new-run").returncode == 0
+    assert (tmp_path / "logs" / "checkpoint.bin").exists()
+
+    # Resuming prints while the world is restored, before the frame output exists
+    result = run("--output", "-")
+    assert result.returncode == 0
+    assert b"Resuming from checkpoint" in result.stderr
+    frame_size = INTERNAL_WIDTH * INTERNAL_HEIGHT * 4
+    assert len(result.stdout) >= frame_size
+    assert len(result.stdout) % frame_size == 0
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Test the pooled explosion particles
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import pygame
+
+import explosion
+from explosion import FRAME_COUNT, ParticleSystem
+
+
+def make_particles(capacity):
+    atlas = pygame.Surface((16 * FRAME_COUNT, 16), pygame.SRCALPHA)
+    items = {"particle": {f"explosion_{i}": (i * 16, 0, 16, 16) for i in range(FRAME_COUNT)}}
+    return ParticleSystem(atlas, items, capacity)
+
+
+def test_particles_live_for_the_whole_animation():
+    particles = make_particles(100)
+    assert particles.explode((0, 0), 20) == 20
+    for _ in range(FRAME_COUNT - 1):
+        particles.update(16)
+    assert len(particles) == 20
+    assert set(particles.frame[:20]) == {FRAME_COUNT - 1}
+    particles.update(16)
+    assert len(particles) == 0
+
+
+def test_pool_is_bounded_and_compacted_in_order():
+    particles = make_particles(30)
+    particles.explode((0, 0), 20)
+    particles.update(16)
+    assert particles.explode((1000, 1000), 20) == 10  # Only 10 slots left
+    for _ in range(FRAME_COUNT - 1):
+        particles.update(16)
+    # The first explosion finished, the later particles moved to the front
+    assert len(particles) == 10
+    assert all(x >= 1000 - explosion.SPREAD for x in particles.x[:10])
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Test the registry of bodies and shapes attached to a space
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import pymunk
+
+from physics import registry
+
+
+def test_add_and_remove_are_idempotent():
+    space = pymunk.Space()
+    body = pymunk.Body(1, 1)
+    shape = pymunk.Circle(body, 5)
+
+    registry(space).add(body, shape)
+    registry(space).add(body, shape)  # Already attached, nothing happens
+    assert body in registry(space) and shape in registry(space)
+    assert space.bodies == [body] and space.shapes == [shape]
+    assert (registry(space).bodies, registry(space).shapes) == (1, 1)
+
+    registry(space).remove(shape, body)
+    registry(space).remove(shape, body)  # Already removed, nothing happens
+    assert len(registry(space)) == 0
+    assert space.bodies == [] and space.shapes == []
+    assert (registry(space).bodies, registry(space).shapes) == (0, 0)
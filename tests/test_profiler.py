@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test the frame time profiler
+"""
+
+import csv
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from profiler import Profiler, percentile
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, ms):
+        self.now += ms / 1000
+
+
+def test_percentile_uses_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([7], 99) == 7
+    assert percentile([], 50) == 0.0
+
+
+def test_marks_add_up_per_phase():
+    clock = FakeClock()
+    profiler = Profiler(phases=("physics", "draw", "wait"), clock=clock)
+
+    clock.advance(2)
+    profiler.mark("physics")
+    clock.advance(3)
+    profiler.mark("draw")
+    clock.advance(1)
+    profiler.mark("physics")  # Second part of the same phase
+    clock.advance(4)
+    profiler.end_frame(tnt=2)  # The rest goes to the last phase
+
+    times, counters = profiler.frames[-1]
+    assert times == {"physics": 3.0, "draw": 3.0, "wait": 4.0}
+    assert counters == {"tnt": 2}
+    assert profiler.stats()["frame"] == (10.0, 10.0, 10.0)
+
+
+def test_window_keeps_the_last_frames(tmp_path):
+    clock = FakeClock()
+    profiler = Profiler(phases=("physics", "wait"), window=10, clock=clock)
+    for frame in range(25):
+        clock.advance(frame)
+        profiler.mark("physics")
+        profiler.end_frame(particles=frame)
+
+    assert len(profiler.frames) == 10
+    assert profiler.stats()["physics"] == pytest.approx((19.0, 24.0, 24.0))
+
+    path = tmp_path / "profile.csv"
+    profiler.export_csv(path)
+    with open(path) as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["frame", "physics", "wait", "total", "particles"]
+    assert len(rows) == 11
+    assert rows[1][0] == "15" and rows[1][-1] == "15"
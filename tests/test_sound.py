@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test the voice and rate limits of the sound manager
+"""
+
+import os
+import sys
+
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from sound import SOUND_GROUPS, SoundManager
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def sounds():
+    clock = FakeClock()
+    try:
+        manager = SoundManager(channels=4, clock=clock)
+    except pygame.error:
+        pytest.skip("no audio driver")
+
+    # Five seconds of silence, so every started voice is still playing during the test
+    silence = pygame.mixer.Sound(buffer=bytes(pygame.mixer.get_init()[0] * 4 * 5))
+    for name in ("tnt", "stone1", "stone2", "grass1"):
+        manager.sounds[name] = silence
+        manager.groups[name] = name.rstrip("0123456789")
+    yield manager, clock
+    pygame.mixer.stop()
+    pygame.mixer.quit()
+
+
+def test_group_is_not_retriggered_too_soon(sounds):
+    manager, clock = sounds
+    assert manager.play_sound("stone1")
+    assert not manager.play_sound("stone2")  # Same group, same moment
+    assert manager.dropped["stone"] == 1
+
+    clock.now += SOUND_GROUPS["stone"][1]
+    assert manager.play_sound("stone2")
+    assert manager.played["stone"] == 2
+
+
+def test_group_voices_are_limited(sounds):
+    manager, clock = sounds
+    max_voices, interval, _ = SOUND_GROUPS["grass"]
+    for _ in range(max_voices):
+        assert manager.play_sound("grass1")
+        clock.now += interval
+    assert not manager.play_sound("grass1")
+    assert manager.dropped["grass"] == 1
+
+
+def test_important_sounds_take_over_busy_channels(sounds):
+    manager, clock = sounds
+    # Fill all four channels with stone and grass
+    for name in ("stone1", "grass1", "stone2", "grass1"):
+        assert manager.play_sound(name)
+        clock.now += 100
+
+    assert manager.play_sound("tnt")  # Replaces a grass voice
+    assert sorted(group for group, _ in manager.voices.values()) == ["grass", "stone", "stone", "tnt"]
+
+    clock.now += 100
+    assert not manager.play_sound("grass1")  # Nothing less important left to replace
+    assert manager.dropped["grass"] == 1
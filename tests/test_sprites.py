@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Test the rotated sprite cache
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import pygame
+
+import sprites
+from sprites import rotated, rotated_overlay
+
+
+def test_close_angles_share_a_surface():
+    texture = pygame.Surface((16, 16), pygame.SRCALPHA)
+    assert rotated(texture, 10.2) is rotated(texture, 9.8)
+    assert rotated(texture, 0) is rotated(texture, 360)
+    assert rotated(texture, 10) is not rotated(texture, 30)
+    assert rotated_overlay((16, 16), 0, 100) is rotated_overlay((16, 16), 0, 20)
+    assert rotated_overlay((16, 16), 0, 20).get_alpha() == 20
+
+
+def test_cache_is_bounded_by_memory(monkeypatch):
+    monkeypatch.setattr(sprites, "CACHE_BYTES", 200 * 1024)
+    for angle in range(0, 360, sprites.ANGLE_STEP):
+        rotated(pygame.Surface((64, 64), pygame.SRCALPHA), angle)
+    assert sprites._cache_bytes <= sprites.CACHE_BYTES
+    assert sprites._cache_bytes == sum(sprites._surface_bytes(surface) for surface in sprites._cache.values())
+
+
+def test_recreated_textures_share_rotations_by_key():
+    entries = len(sprites._cache)
+    # Like the pickaxe growing and shrinking back again and again: a new surface every time
+    for _ in range(20):
+        enlarged = pygame.Surface((48, 48), pygame.SRCALPHA)
+        for angle in range(0, 90, sprites.ANGLE_STEP):
+            rotated(enlarged, angle, 1, ("diamond_pickaxe", True))
+    assert len(sprites._cache) == entries + 90 // sprites.ANGLE_STEP
+    assert rotated(pygame.Surface((48, 48)), 10, 1, ("diamond_pickaxe", True)) is rotated(enlarged, 10, 1, ("diamond_pickaxe", True))
+
+
+def test_blinking_tnt_keep_their_overlays_cached():
+    # Four superchats worth of TNT, all at different angles, blinking for a few seconds
+    tnt_angles = [angle * 9 for angle in range(40)]
+    overlays = [rotated_overlay((120, 120), angle, 0) for angle in tnt_angles]
+    for frame in range(180):
+        alpha = frame * 7 % 193
+        for angle, overlay in zip(tnt_angles, overlays):
+            assert rotated_overlay((120, 120), angle, alpha) is overlay
+            assert overlay.get_alpha() == alpha
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Test cached text rendering
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import pygame
+
+from text import draw_outlined, outlined
+
+
+def test_glyph_matches_label():
+    pygame.font.init()
+    font = pygame.font.Font(None, 64)
+    label = outlined("7", font)
+    surface = pygame.Surface(label.get_size(), pygame.SRCALPHA)
+    assert draw_outlined(surface, "7", (0, 0), font).size == label.get_size()
+    for x in range(label.get_width()):
+        for y in range(label.get_height()):
+            assert surface.get_at((x, y)).a == label.get_at((x, y)).a
+
+
+def test_drawn_rect_covers_text():
+    pygame.font.init()
+    font = pygame.font.Font(None, 64)
+    surface = pygame.Surface((600, 100), pygame.SRCALPHA)
+    rect = draw_outlined(surface, "Y: -1234567890", (10, 20), font)
+    assert surface.get_bounding_rect().width > 0
+    assert rect.contains(surface.get_bounding_rect())
+
+
+def test_labels_are_cached():
+    pygame.font.init()
+    font = pygame.font.Font(None, 64)
+    assert outlined("Normal", font) is outlined("Normal", font)
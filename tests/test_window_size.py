@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test that drawing at the window size looks like scaling a finished 1080x1920 frame
+"""
+
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import pymunk
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import block
+from atlas import create_texture_atlas, scale_texture_atlas
+from camera import Camera
+from chunk import Chunk, generate_chunk
+from constants import BLOCK_SCALE_FACTOR, BLOCK_SIZE, BLOCK_TEXTURE_SIZE, CHUNK_HEIGHT, CHUNK_WIDTH, INTERNAL_HEIGHT, INTERNAL_WIDTH
+from pickaxe import Pickaxe
+from sound import SoundManager
+from walls import Walls
+
+ASSETS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "assets")
+
+
+@pytest.fixture(scope="module")
+def scene():
+    base_atlas, base_items = create_texture_atlas(ASSETS)
+    atlas, items = scale_texture_atlas(base_atlas, base_items, BLOCK_SCALE_FACTOR)
+    space = pymunk.Space()
+
+    chunk = Chunk(0, 3, generate_chunk(0, 3))
+    chunk.block(CHUNK_WIDTH + 3).hit(5, 0)  # Shows a destroy stage
+    walls = Walls(space, atlas, items)
+    pickaxe = Pickaxe(space, INTERNAL_WIDTH // 2, 3 * CHUNK_HEIGHT * BLOCK_SIZE + 400, atlas.subsurface(items["pickaxe"]["wooden_pickaxe"]), SoundManager(False))
+    pickaxe.body.angle = 0.3
+    yield base_atlas, base_items, atlas, items, chunk, walls, pickaxe
+    block._heal_queue.clear()
+
+
+def draw(canvas, camera, atlas, items, chunk, walls, pickaxe):
+    canvas.fill((0, 0, 0))
+    chunk.draw(canvas, camera, atlas, items)
+    walls.draw(canvas, camera)
+    pickaxe.draw(canvas, camera)
+
+
+def window_frame(scene, window_width):
+    # The same steps as `use_window_size` in main
+    base_atlas, base_items, atlas, items, chunk, walls, pickaxe = scene
+    camera = Camera()
+    camera.offset_y = 3 * CHUNK_HEIGHT * BLOCK_SIZE
+    cell_size = max(1, round(BLOCK_SIZE * window_width / INTERNAL_WIDTH))
+    camera.scale = cell_size / BLOCK_SIZE
+    render_atlas, render_items = scale_texture_atlas(base_atlas, base_items, cell_size / BLOCK_TEXTURE_SIZE)
+    canvas = pygame.Surface((window_width, window_width * 16 // 9))
+    draw(canvas, camera, render_atlas, render_items, chunk, walls, pickaxe)
+    return canvas, render_atlas
+
+
+def scaled_frame(scene, window_width):
+    base_atlas, base_items, atlas, items, chunk, walls, pickaxe = scene
+    camera = Camera()
+    camera.offset_y = 3 * CHUNK_HEIGHT * BLOCK_SIZE
+    internal = pygame.Surface((INTERNAL_WIDTH, INTERNAL_HEIGHT))
+    draw(internal, camera, atlas, items, chunk, walls, pickaxe)
+    return pygame.transform.scale(internal, (window_width, window_width * 16 // 9))
+
+
+@pytest.mark.parametrize("window_width", [540, 360])
+def test_window_size_frame_looks_like_the_scaled_frame(scene, window_width):
+    direct, _ = window_frame(scene, window_width)
+    scaled = scaled_frame(scene, window_width)
+    a, b = pygame.image.tobytes(direct, "RGB"), pygame.image.tobytes(scaled, "RGB")
+    difference = [abs(x - y) for x, y in zip(a, b)]
+    assert sum(difference) / len(difference) < 1  # Nearest neighbour scaling picks slightly different texels
+    far_off = sum(1 for i in range(0, len(difference), 3) if max(difference[i:i + 3]) > 64)
+    assert far_off / (len(difference) // 3) < 0.01  # Only pixels along edges differ a lot
+
+
+def test_caches_follow_the_window_size(scene):
+    chunk, walls = scene[4], scene[5]
+    _, atlas_540 = window_frame(scene, 540)
+    assert chunk.surface.get_width() == CHUNK_WIDTH * 60
+    assert list(block._texture_cache) == [atlas_540]
+
+    _, atlas_360 = window_frame(scene, 360)  # Resized
+    assert chunk.surface.get_width() == CHUNK_WIDTH * 40
+    assert list(block._texture_cache) == [atlas_360]  # The old textures are dropped
+    assert list(block._destroy_stage_cache) == [atlas_360]
+    assert walls.scaled_strip[0] == 40 / BLOCK_SIZE